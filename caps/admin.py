@@ -1,9 +1,40 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
 
 from . import models
 
 
-__all__ = ("AgentAdmin", "AccessAdmin", "register_object")
+__all__ = ("EstimatedCountPaginator", "AgentAdmin", "AccessAdmin", "register_object")
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using the planner's rows estimate of the table instead of a full ``COUNT(*)``
+    for unfiltered querysets on PostgreSQL, when the table is large enough.
+
+    Other querysets are counted as usual.
+    """
+
+    estimate_threshold = 10000
+    """Under this estimated amount of rows, an actual count is run."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, "query", None) is not None and not queryset.query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_threshold:
+                    return int(row[0])
+        return super().count
 
 
 @admin.register(models.Agent)
@@ -11,16 +42,34 @@ class AgentAdmin(admin.ModelAdmin):
     """Admin interface for an :py:class:`~.models.agent.Agent`."""
 
     list_display = ("uuid", "user", "group")
-    list_filter = ("group",)
+    # only filter on agents kind: listing groups would be unbounded
+    list_filter = (("group", admin.EmptyFieldListFilter),)
+    list_select_related = ("user", "group")
+    search_fields = ("uuid", "user__username", "group__name")
     fields = ("uuid", "user", "group")
     readonly_fields = ("uuid",)
+    raw_id_fields = ("user", "group")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class AccessAdmin(admin.ModelAdmin):
-    """Admin interface for an :py:class:`~.models.access.Access`."""
+    """Admin interface for an :py:class:`~.models.access.Access`.
 
-    list_display = ("uuid", "target", "origin", "emitter", "receiver", "expiration")
+    The changelist runs a constant amount of queries whatever the amount of rows.
+    """
+
+    list_display = ("uuid", "target", "origin_uuid", "emitter", "receiver", "expiration")
+    list_select_related = ("target", "origin", "emitter__user", "emitter__group", "receiver__user", "receiver__group")
     fields = ("uuid", "target", "origin", "emitter", "receiver", "expiration", "grants")
+    raw_id_fields = ("target", "origin")
+    autocomplete_fields = ("emitter", "receiver")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description=_("Origin"), ordering="origin__uuid")
+    def origin_uuid(self, obj):
+        return obj.origin and obj.origin.uuid
 
 
 def register_object(obj_class: type[models.Owned], admin_class: type[admin.ModelAdmin]):
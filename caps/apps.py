@@ -12,5 +12,10 @@ class CapsConfig(AppConfig):
     label = "caps"
 
     def ready(self):
-        """Import signals."""
+        """Import signals and register root grants' permissions."""
         from . import signals  # noqa: F401
+        from .models import Access, registry
+
+        registry.register(
+            perm for model in Access.get_concrete_models() for perm in model.get_object_class().root_grants
+        )
@@ -1,5 +1,5 @@
 from django.contrib.auth.backends import BaseBackend
-from . import models
+from . import cache, models
 
 
 __all__ = ("PermissionsBackend",)
@@ -12,6 +12,13 @@ class PermissionsBackend(BaseBackend):
     The check is only run on :py:class:`~.models.owned.Owned` and
     :py:class:`~/models.access.Access` instances.
 
+    For lists, fetch objects using :py:meth:`~.models.owned.OwnedQuerySet.with_permissions`:
+    checks then don't run any query.
+
+    Permission decisions are memoized on the user object for its lifetime (usually the
+    request), by object, access and permission, as ``ModelBackend`` does for user's
+    permissions. They are dropped by :py:func:`caps.cache.invalidate_user`.
+
     You can add it to the ``AUTHENTICATION_BACKENDS`` setting, as:
 
     ..code-block:: python
@@ -23,12 +30,46 @@ class PermissionsBackend(BaseBackend):
 
     """
 
+    cache_name = "perms"
+    """Name of user's memoized values holding permission decisions (see :py:mod:`caps.cache`)."""
+
+    def get_perm_key(self, obj, perm: str) -> tuple | None:
+        """Return key of a permission decision, or None if it can't be memoized."""
+        if obj.pk is None:
+            return None
+        access = obj if isinstance(obj, models.Access) else obj.access
+        return (obj._meta.label, obj.pk, access and access.pk, perm)
+
+    def get_perms_cache(self, user) -> dict:
+        """Return user's memoized permission decisions."""
+        return cache.get_user_cache(user).setdefault(self.cache_name, {})
+
     def has_perm(self, user, perm, obj=None) -> bool:
-        if isinstance(obj, (models.Owned, models.Access)):
+        if not isinstance(obj, (models.Owned, models.Access)):
+            return False
+        if (key := self.get_perm_key(obj, perm)) is None:
             return obj.has_perm(user, perm)
-        return False
+        perms = self.get_perms_cache(user)
+        if (value := perms.get(key)) is None:
+            value = perms[key] = obj.has_perm(user, perm)
+        return value
 
     def get_all_permissions(self, user, obj=None) -> set[str]:
         if isinstance(obj, (models.Owned, models.Access)):
             return obj.get_all_permissions(user)
         return set()
+
+    async def ahas_perm(self, user, perm, obj=None) -> bool:
+        if not isinstance(obj, (models.Owned, models.Access)):
+            return False
+        if (key := self.get_perm_key(obj, perm)) is None:
+            return await obj.ahas_perm(user, perm)
+        perms = self.get_perms_cache(user)
+        if (value := perms.get(key)) is None:
+            value = perms[key] = await obj.ahas_perm(user, perm)
+        return value
+
+    async def aget_all_permissions(self, user, obj=None) -> set[str]:
+        if isinstance(obj, (models.Owned, models.Access)):
+            return await obj.aget_all_permissions(user)
+        return set()
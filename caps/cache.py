@@ -0,0 +1,173 @@
+"""
+This module provides caching of user related data used by permission checks
+(eg. user's groups ids used by :py:meth:`~.models.agent.Agent.is_agent`, or
+user's agents resolved by :py:meth:`~.models.agent.AgentQuerySet.resolve`).
+
+Values are always memoized on the user object itself, for its lifetime (usually
+the request). They can also be shared across requests using Django's cache
+framework, by providing the cache alias to use with the ``CAPS_CACHE`` setting:
+
+.. code-block:: python
+
+    CAPS_CACHE = "default"
+
+Values shared in cache are keyed by user and a per-user version stamp. Cached
+values are invalidated by bumping this version, from the signals of
+:py:mod:`caps.signals`: when user's groups change, a group is deleted, or an
+agent is created or deleted. They are warmed up on user login.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import TypeVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import BaseCache, caches
+
+
+__all__ = (
+    "get_cache",
+    "get_user_value",
+    "aget_user_value",
+    "get_user_group_ids",
+    "aget_user_group_ids",
+    "invalidate_user",
+    "invalidate_users",
+)
+
+
+T = TypeVar("T")
+
+
+USER_ATTR = "_caps_cache"
+"""User's attribute used to memoize values."""
+
+
+def get_cache() -> BaseCache | None:
+    """Return cache defined by ``CAPS_CACHE`` setting, if any."""
+    if alias := getattr(settings, "CAPS_CACHE", None):
+        return caches[alias]
+    return None
+
+
+def get_key(name: str, user_id: int, version: int | None = None) -> str:
+    """Return cache key for the provided user's value."""
+    if version is None:
+        return f"caps.{name}.{user_id}"
+    return f"caps.{name}.{user_id}.{version}"
+
+
+def new_version() -> int:
+    """Return a new version stamp.
+
+    It is time based in order not to reuse the version of still cached values
+    when the version key has been evicted from the cache.
+    """
+    return time.time_ns() // 1000
+
+
+def get_version(cache: BaseCache, user_id: int) -> int:
+    """Return current version stamp of user's cached values."""
+    key = get_key("version", user_id)
+    if (version := cache.get(key)) is None:
+        # don't overwrite a concurrent bump
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(cache: BaseCache, user_id: int) -> int:
+    """Return current version stamp of user's cached values (async)."""
+    key = get_key("version", user_id)
+    if (version := await cache.aget(key)) is None:
+        await cache.aadd(key, new_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_user_cache(user: User) -> dict:
+    """Return memoized values on user object."""
+    if (values := getattr(user, USER_ATTR, None)) is None:
+        values = {}
+        setattr(user, USER_ATTR, values)
+    return values
+
+
+def get_user_value(user: User, name: str, loader: Callable[[], T]) -> T:
+    """Return user's value, memoized on user and cached if enabled.
+
+    :param user: the user
+    :param name: value's name
+    :param loader: called in order to get the value when not cached.
+    """
+    values = get_user_cache(user)
+    if (value := values.get(name)) is not None:
+        return value
+
+    if (cache := get_cache()) is None:
+        value = loader()
+    else:
+        key = get_key(name, user.pk, get_version(cache, user.pk))
+        if (value := cache.get(key)) is None:
+            value = loader()
+            cache.set(key, value)
+
+    values[name] = value
+    return value
+
+
+async def aget_user_value(user: User, name: str, loader: Callable[[], Awaitable[T]]) -> T:
+    """Return user's value, memoized on user and cached if enabled (async).
+
+    See :py:func:`get_user_value`, ``loader`` being a coroutine function.
+    """
+    values = get_user_cache(user)
+    if (value := values.get(name)) is not None:
+        return value
+
+    if (cache := get_cache()) is None:
+        value = await loader()
+    else:
+        key = get_key(name, user.pk, await aget_version(cache, user.pk))
+        if (value := await cache.aget(key)) is None:
+            value = await loader()
+            await cache.aset(key, value)
+
+    values[name] = value
+    return value
+
+
+def get_user_group_ids(user: User) -> frozenset[int]:
+    """Return ids of the groups user belongs to."""
+    return get_user_value(user, "groups", lambda: frozenset(user.groups.all().values_list("pk", flat=True)))
+
+
+async def aget_user_group_ids(user: User) -> frozenset[int]:
+    """Return ids of the groups user belongs to (async)."""
+
+    async def loader():
+        return frozenset([pk async for pk in user.groups.all().values_list("pk", flat=True)])
+
+    return await aget_user_value(user, "groups", loader)
+
+
+def invalidate_user(user: User):
+    """Drop cached values of the provided user (object and cache)."""
+    if hasattr(user, USER_ATTR):
+        delattr(user, USER_ATTR)
+    invalidate_users((user.pk,))
+
+
+def invalidate_users(user_ids: Iterable[int]):
+    """Invalidate cached values of the provided users' ids by bumping their version."""
+    if (cache := get_cache()) is not None:
+        for user_id in user_ids:
+            key = get_key("version", user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # missing key: a new version is used on next read anyway
+                pass
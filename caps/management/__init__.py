@@ -0,0 +1,26 @@
+"""Helpers shared by management commands."""
+
+from collections.abc import Iterable
+
+from django.core.management.base import CommandError
+
+from caps.models import Access
+
+
+__all__ = ("get_access_models",)
+
+
+def get_access_models(labels: Iterable[str] = ()) -> list[type[Access]]:
+    """Return concrete Access models of Owned models by label (as ``app_label.ModelName``).
+
+    :param labels: models labels, all concrete Access models are returned if empty.
+    :raises CommandError: a label is unknown or not the one of a concrete Access model.
+    """
+    models = Access.get_concrete_models()
+    if not labels:
+        return models
+    by_label = {model._meta.label_lower: model for model in models}
+    try:
+        return [by_label[label.lower()] for label in labels]
+    except KeyError as err:
+        raise CommandError(f"Unknown access model: {err.args[0]}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from caps.models import Access
+
+
+class Command(BaseCommand):
+    help = "Encode grants of all accesses (to be run when enabling CAPS_GRANTS_ENCODING or CAPS_ACCESS_GRANTS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Amount of accesses updated per query.")
+        parser.add_argument("--table", action="store_true", help="Also rebuild access grants table.")
+
+    def handle(self, *args, batch_size, table, **options):
+        for model in Access.get_concrete_models():
+            count = model.objects.encode_grants(batch_size=batch_size)
+            self.stdout.write(f"{model._meta.label}: encoded grants of {count} access(es).")
+            if table:
+                count = model.objects.rebuild_grants(batch_size=batch_size)
+                self.stdout.write(f"{model._meta.label}: rebuilt grants rows of {count} access(es).")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from caps.models import Agent, AgentMembership
+
+
+class Command(BaseCommand):
+    help = "Create missing agents of users and groups in bulk (eg. after users have been imported)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Amount of agents created per query.")
+        parser.add_argument("--users", action="store_true", help="Only create agents of users.")
+        parser.add_argument("--groups", action="store_true", help="Only create agents of groups.")
+        parser.add_argument("--memberships", action="store_true", help="Rebuild agents memberships table.")
+
+    def handle(self, *args, batch_size, users, groups, memberships, **options):
+        both = not users and not groups
+        if both or users:
+            count = Agent.objects.ensure_for_users(batch_size=batch_size)
+            self.stdout.write(f"Created {count} user agent(s).")
+        if both or groups:
+            count = Agent.objects.ensure_for_groups(batch_size=batch_size)
+            self.stdout.write(f"Created {count} group agent(s).")
+        if memberships:
+            count = AgentMembership.objects.rebuild(batch_size=batch_size)
+            self.stdout.write(f"Rebuilt {count} agent membership(s).")
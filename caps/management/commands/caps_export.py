@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from caps.management import get_access_models
+
+
+FIELDS = {
+    "uuid": "uuid",
+    "origin": "origin__uuid",
+    "target": "target__uuid",
+    "emitter": "emitter__uuid",
+    "receiver": "receiver__uuid",
+    "expiration": "expiration",
+    "grants": "grants",
+}
+"""Exported keys and the lookups of their values."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Export accesses as JSON lines, referencing agents, targets and origins by uuid. Accesses are "
+        "ordered root first, so that they can be loaded back with caps_import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Only export these access models (as app_label.ModelName).")
+        parser.add_argument("-o", "--output", help="Output file (defaults to stdout).")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Amount of accesses fetched per query.")
+
+    def handle(self, *args, models, output, chunk_size, **options):
+        access_models = get_access_models(models)
+        stream = open(output, "w") if output else self.stdout
+        try:
+            for model in access_models:
+                count = self.export(stream, model, chunk_size)
+                self.stderr.write(f"{model._meta.label}: exported {count} access(es).")
+        finally:
+            if output:
+                stream.close()
+
+    def export(self, stream, model, chunk_size) -> int:
+        """Write accesses of the provided model, returning their count."""
+        label, count = model._meta.label_lower, 0
+        values = model.objects.order_by("depth", "pk").values_list(*FIELDS.values())
+        for row in values.iterator(chunk_size=chunk_size):
+            item = {"model": label, **dict(zip(FIELDS.keys(), row))}
+            stream.write(json.dumps(item, default=self.encode) + "\n")
+            count += 1
+        return count
+
+    def encode(self, value):
+        """Encode values that are not JSON serializable (uuids and datetimes), without precision loss."""
+        return value.isoformat() if isinstance(value, datetime) else str(value)
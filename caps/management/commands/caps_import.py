@@ -0,0 +1,90 @@
+import io
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from caps.management import get_access_models
+from caps.models import Agent
+
+
+class Command(BaseCommand):
+    help = (
+        "Import accesses from JSON lines produced by caps_export. Model labels are validated before any write, "
+        "references are resolved by batches, and accesses whose uuid already exists are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Input file ('-' for stdin).")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Amount of accesses created per batch.")
+
+    def handle(self, *args, input, batch_size, **options):
+        # stdin can't be read twice: it is buffered in order to validate labels before any write.
+        stream = io.StringIO(sys.stdin.read()) if input == "-" else open(input)
+        try:
+            labels = {json.loads(line)["model"]: None for line in stream if line.strip()}
+            access_models = dict(zip(labels, get_access_models(labels))) if labels else {}
+            stream.seek(0)
+            counts = self.load_stream(stream, access_models, batch_size)
+        finally:
+            stream.close()
+
+        for model, count in counts.items():
+            self.stdout.write(f"{model._meta.label}: imported {count} access(es).")
+
+    def load_stream(self, stream, access_models, batch_size) -> dict[type, int]:
+        """Create accesses of stream by batches, returning created count per model."""
+        counts = {}
+        model, batch, uuids = None, [], set()
+        for line in stream:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item_model = access_models[item["model"]]
+            # origins must be saved before their derived accesses
+            if batch and (item_model is not model or len(batch) >= batch_size or item["origin"] in uuids):
+                counts[model] = counts.get(model, 0) + self.load(model, batch)
+                batch, uuids = [], set()
+            model = item_model
+            batch.append(item)
+            uuids.add(item["uuid"])
+        if batch:
+            counts[model] = counts.get(model, 0) + self.load(model, batch)
+        return counts
+
+    def load(self, model, items) -> int:
+        """Create accesses of a batch, resolving references in a query per relation, returning created count."""
+        existing = self.get_ids(model.objects, {item["uuid"] for item in items})
+        items = [item for item in items if item["uuid"] not in existing]
+        if not items:
+            return 0
+
+        agents = self.get_ids(Agent.objects, {item[key] for item in items for key in ("emitter", "receiver")})
+        targets = self.get_ids(model.get_object_class().objects, {item["target"] for item in items})
+        origins = self.get_ids(model.objects, {item["origin"] for item in items if item["origin"]})
+
+        objs = []
+        for item in items:
+            try:
+                objs.append(
+                    model(
+                        uuid=item["uuid"],
+                        origin_id=item["origin"] and origins[item["origin"]],
+                        target_id=targets[item["target"]],
+                        emitter_id=agents[item["emitter"]],
+                        receiver_id=agents[item["receiver"]],
+                        expiration=item["expiration"] and parse_datetime(item["expiration"]),
+                        grants=item["grants"],
+                    )
+                )
+            except KeyError as err:
+                raise CommandError(f"Access {item['uuid']}: reference not found: {err.args[0]}")
+        model.objects.bulk_create(objs)
+        return len(objs)
+
+    def get_ids(self, queryset, uuids) -> dict[str, int]:
+        """Return ids of objects by uuid (as string)."""
+        if not uuids:
+            return {}
+        return {str(uuid): pk for uuid, pk in queryset.filter(uuid__in=uuids).values_list("uuid", "pk")}
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from caps.management import get_access_models
+
+
+class Command(BaseCommand):
+    help = "Delete expired accesses and their cascaded ones, by chunks (eg. to be run periodically from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Only sweep these access models (as app_label.ModelName).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Amount of expired accesses per query.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count accesses that would be deleted.")
+
+    def handle(self, *args, models, chunk_size, dry_run, **options):
+        verb = "Would delete" if dry_run else "Deleted"
+        totals = [0, 0]
+        for model in get_access_models(models):
+            start = time.monotonic()
+            expired, cascaded = model.objects.sweep_expired(chunk_size=chunk_size, dry_run=dry_run)
+            totals = [totals[0] + expired, totals[1] + cascaded]
+            self.stdout.write(
+                f"{model._meta.label}: {verb.lower()} {expired} expired and {cascaded} cascaded access(es) "
+                f"in {time.monotonic() - start:.2f}s."
+            )
+        self.stdout.write(f"{verb} {totals[0]} expired and {totals[1]} cascaded access(es).")
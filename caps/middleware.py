@@ -1,6 +1,8 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
 
-from .models import Agent, AgentQuerySet
+from .models import Agent, AgentSet
 
 __all__ = ("AgentMiddleware",)
 
@@ -10,9 +12,12 @@ class AgentMiddleware:
     This middleware adds user's agents to the request object, as:
 
         - ``agent``: the current agent user is acting as;
-        - ``agents``: the agents user can impersonate.
+        - ``agents``: the agents user can impersonate, as an :py:class:`~.models.agent.AgentSet`.
 
-    It creates user's default agent if none is already present.
+    Both are lazy: the agents are fetched at most once, the first time they are used
+    by a view, serializer or queryset. It creates user's default agent if none is
+    already present. For anonymous users, ``agent`` is fetched directly since it is
+    None when there is no anonymous agent.
 
     You can add it to the ``MIDDLEWARE`` setting, after ``AuthenticationMiddleware``:
 
@@ -26,8 +31,14 @@ class AgentMiddleware:
             "caps.middleware.AgentMiddleware",
         ]
 
+    The middleware supports both sync and async requests. Under ASGI, agents are
+    fetched asynchronously before calling the view, so they can be used from async
+    views without further database access.
     """
 
+    sync_capable = True
+    async_capable = True
+
     agent_class = Agent
     """Agent model class to use."""
     agent_cookie_key = "django_caps.agent"
@@ -35,24 +46,56 @@ class AgentMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         request.agents = self.get_agents(request)
-        request.agent = self.get_agent(request, request.agents)
+        if request.user.is_anonymous:
+            # there may be no anonymous agent: None can't be wrapped in a lazy object
+            request.agent = self.get_agent(request, request.agents)
+        else:
+            request.agent = SimpleLazyObject(lambda: self.get_agent(request, request.agents))
         return self.get_response(request)
 
-    def get_agents(self, request: HttpRequest) -> AgentQuerySet:
-        """Return queryset for user's agents, ordered by ``-user_id``."""
-        return Agent.objects.user(request.user, strict=False).order_by("-user_id")
+    async def __acall__(self, request: HttpRequest):
+        request.agents = await self.aget_agents(request)
+        request.agent = await self.aget_agent(request, request.agents)
+        return await self.get_response(request)
+
+    def get_agents(self, request: HttpRequest) -> AgentSet:
+        """Return lazy set of user's agents, user's agent first."""
+        return AgentSet(request.user)
+
+    async def aget_agents(self, request: HttpRequest) -> AgentSet:
+        """Return user's agents, fetched asynchronously."""
+        user = await request.auser() if hasattr(request, "auser") else request.user
+        return await AgentSet(user).aload()
+
+    async def aget_agent(self, request: HttpRequest, agents: AgentSet) -> Agent:
+        """Return user's active agent (async). See :py:meth:`get_agent`."""
+        user = agents.user
+        if user.is_anonymous:
+            return next(iter(agents), None)
+        if not (agent := agents.agent):
+            agent, _ = await Agent.objects.aget_or_create(user=user)
+            agents.add(agent)
+        return agent
 
-    def get_agent(self, request: HttpRequest, agents: AgentQuerySet) -> Agent:
+    def get_agent(self, request: HttpRequest, agents: AgentSet | list[Agent]) -> Agent:
         """Return user's active agent."""
         if request.user.is_anonymous:
             return next(iter(agents), None)
-        if agent := getattr(request.user, "agent", None):
+        if agent := next((a for a in agents if a.user_id == request.user.pk), None):
             return agent
+        if not (agent := getattr(request.user, "agent", None)):
+            agent = Agent.objects.create(user=request.user)
+            # assign agent to request's user as it ain't already present
+            request.user.__dict__["agent"] = agent
 
-        agent = Agent.objects.create(user=request.user)
-        # assign agent to request's user as it ain't already present
-        request.user.__dict__["agent"] = agent
+        if isinstance(agents, AgentSet):
+            agents.add(agent)
         return agent
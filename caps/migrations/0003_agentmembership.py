@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def forwards_func(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    Agent = apps.get_model("caps", "Agent")
+    AgentMembership = apps.get_model("caps", "AgentMembership")
+    db_alias = schema_editor.connection.alias
+
+    user_agents = Agent.objects.using(db_alias).filter(user__isnull=False).values_list("user_id", "pk")
+    group_agents = (
+        User.groups.through.objects.using(db_alias)
+        .filter(group__agent__isnull=False)
+        .values_list("user_id", "group__agent")
+    )
+    memberships = [AgentMembership(user_id=u, agent_id=a) for u, a in (*user_agents, *group_agents)]
+    AgentMembership.objects.using(db_alias).bulk_create(memberships, batch_size=1000)
+
+
+def backward_func(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps", "0002_alter_agent_options"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgentMembership",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "agent",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="caps.agent",
+                        verbose_name="Agent",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Agent membership",
+                "verbose_name_plural": "Agent memberships",
+                "unique_together": {("user", "agent")},
+            },
+        ),
+        migrations.RunPython(forwards_func, backward_func),
+    ]
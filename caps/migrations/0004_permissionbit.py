@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps", "0003_agentmembership"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PermissionBit",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=255, unique=True, verbose_name="Permission")),
+                ("bit", models.PositiveSmallIntegerField(unique=True, verbose_name="Bit")),
+            ],
+            options={
+                "verbose_name": "Permission bit",
+                "verbose_name_plural": "Permission bits",
+            },
+        ),
+    ]
@@ -1,13 +1,23 @@
-from .agent import Agent, AgentQuerySet
+from .agent import Agent, AgentQuerySet, AgentMembership, AgentMembershipQuerySet, AgentSet
+from .grants import AccessGrant, PermissionBit, PermissionBitQuerySet, PermissionRegistry, registry
 from .owned import Owned, OwnedQuerySet, OwnedBase
-from .access import Access, AccessQuerySet
+from .access import Access, AccessBase, AccessQuerySet
 
 __all__ = (
     "Agent",
     "AgentQuerySet",
+    "AgentMembership",
+    "AgentMembershipQuerySet",
+    "AgentSet",
+    "AccessGrant",
+    "PermissionBit",
+    "PermissionBitQuerySet",
+    "PermissionRegistry",
+    "registry",
     "Owned",
     "OwnedQuerySet",
     "OwnedBase",
     "Access",
+    "AccessBase",
     "AccessQuerySet",
 )
@@ -3,23 +3,103 @@ from __future__ import annotations
 import uuid
 from collections.abc import Iterable
 
+from django.apps import apps
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
-from django.db import models
-from django.db.models import Q
+from django.db import models, router, transaction
+from django.db.backends.utils import names_digest
+from django.db.models import F, Q
+from django.db.models.functions import Cast, Concat, LPad
 from django.urls import reverse
 from django.utils import timezone as tz
 from django.utils.translation import gettext_lazy as _
 
-from caps.utils import get_lazy_relation
-from .agent import Agent
+from caps.utils import PATH_WIDTH, aget_related, get_lazy_relation, get_path_segment
+from .agent import Agent, AgentSet
+from .grants import AccessGrant, PermissionBit, registry
+from .nested import NestedModelBase
 
 __all__ = (
+    "AccessBase",
     "AccessQuerySet",
     "Access",
 )
 
 
+class AccessBase(NestedModelBase):
+    """Metaclass for Access model classes.
+
+    It subclass AccessGrant as `Grant` if no such member is provided. The Grant
+    table is always created, whether ``CAPS_ACCESS_GRANTS`` is enabled or not, so
+    that enabling it only requires to fill it.
+    """
+
+    nested_class = AccessGrant
+    nested_name = "Grant"
+
+    def __new__(cls, name, bases, attrs, **kwargs):
+        new_class = super().__new__(cls, name, bases, attrs, **kwargs)
+        if indexes := cls.get_access_indexes(new_class):
+            opts, declared = new_class._meta, {index.name for index in new_class._meta.indexes}
+            opts.indexes = [*opts.indexes, *(index for index in indexes if index.name not in declared)]
+            # read by migrations' model state
+            opts.original_attrs["indexes"] = opts.indexes
+        return new_class
+
+    @classmethod
+    def get_access_indexes(cls, new_class) -> list[models.Index]:
+        """Return indexes of a concrete Access model, matching the queries run on accesses:
+
+        - ``receiver IN (...) AND (expiration IS NULL OR expiration > now)`` (:py:meth:`~.owned.OwnedQuerySet.available`);
+        - ``receiver IN (...) AND expiration IS NULL``, partial index on the accesses that never expire;
+        - ``target = X AND receiver IN (...)`` (:py:meth:`~.owned.OwnedQuerySet.access`);
+        - ``uuid = X AND receiver IN (...)`` (:py:meth:`AccessQuerySet.access`).
+
+        As they cover lookups on their first column, ``receiver``, ``target`` and ``uuid`` fields
+        don't have their own index. Indexes are added to every concrete Access model, whether it
+        is generated by :py:class:`~.owned.OwnedBase` or declared on the Owned model, after the
+        ones of its ``Meta``.
+
+        Index names are derived from the model label in order to be unique and short enough for all
+        database backends. No index is provided to abstract models.
+        """
+        opts = new_class._meta
+        if opts.abstract or opts.proxy:
+            return []
+        prefix = "caps_" + names_digest(opts.app_label, new_class.__name__.lower(), length=8)
+        indexes = [
+            models.Index(fields=["receiver", "expiration"], name=f"{prefix}_rcv_exp"),
+            models.Index(fields=["receiver"], condition=Q(expiration__isnull=True), name=f"{prefix}_rcv_noexp"),
+        ]
+        if any(field.name == "target" for field in opts.local_fields):
+            indexes.append(models.Index(fields=["target", "receiver"], name=f"{prefix}_tgt_rcv"))
+        indexes.append(models.Index(fields=["uuid", "receiver"], name=f"{prefix}_uuid_rcv"))
+        return indexes
+
+    @classmethod
+    def create_nested_class(cls, new_class, name, attrs={}):
+        """Provide `access` ForeignKey and indexes on nested AccessGrant model."""
+        indexes = []
+        if not new_class._meta.abstract:
+            prefix = "caps_" + names_digest(new_class._meta.app_label, name.lower(), length=8)
+            indexes = [models.Index(fields=["permission", "access"], name=f"{prefix}_perm_acc")]
+        meta = cls.set_meta(attrs, defaults={"indexes": indexes, "unique_together": (("access", "permission"),)})
+        return super(AccessBase, cls).create_nested_class(
+            new_class,
+            name,
+            {
+                "access": models.ForeignKey(
+                    new_class,
+                    models.CASCADE,
+                    related_name="access_grants",
+                    verbose_name=_("Access"),
+                ),
+                **attrs,
+                "Meta": meta,
+            },
+        )
+
+
 class AccessQuerySet(models.QuerySet):
     """QuerySet for Access classes."""
 
@@ -72,6 +152,17 @@ class AccessQuerySet(models.QuerySet):
             self = self.receiver(receiver)
         return self.get(uuid=uuid)
 
+    async def aaccess(self, receiver: Agent | Iterable[Agent] | None, uuid: uuid.UUID) -> Access:
+        """Access by uuid and receiver(s) (async).
+
+        See :py:meth:`access`. An :py:class:`~.agent.AgentSet` is loaded asynchronously.
+        """
+        if isinstance(receiver, AgentSet):
+            receiver = (await receiver.aload()).ids
+        if receiver:
+            self = self.receiver(receiver)
+        return await self.aget(uuid=uuid)
+
     def accesses(self, receiver: Agent | Iterable[Agent] | None, uuids: Iterable[uuid.UUID]) -> AccessQuerySet:
         """Accesss by many uuid and receiver(s).
 
@@ -84,16 +175,254 @@ class AccessQuerySet(models.QuerySet):
             self = self.receiver(receiver)
         return self.filter(uuid__in=uuids)
 
+    def subtree(self, access: Access, include_self: bool = True) -> AccessQuerySet:
+        """Filter accesses derived (directly or not) from the provided one.
+
+        This is a single prefix lookup on the indexed :py:attr:`Access.path`.
+
+        :param access: the access
+        :param include_self: if True, include access itself.
+        """
+        q = Q(path__startswith=access.subtree_path)
+        if include_self:
+            q |= Q(pk=access.pk)
+        return self.filter(q)
+
+    def descendants_of(self, access: Access) -> AccessQuerySet:
+        """Accesses derived (directly or not) from the provided one, ordered depth first.
+
+        Items are annotated with ``distance``, the depth relative to ``access``.
+        """
+        return self.subtree(access, include_self=False).annotate(distance=F("depth") - access.depth).tree_order()
+
+    def ancestors_of(self, access: Access) -> AccessQuerySet:
+        """Accesses from which the provided one is derived, ordered from the root.
+
+        Items are annotated with ``distance``, the depth relative to ``access``.
+        """
+        ids = [int(pk) for pk in access.path.split("/") if pk]
+        return self.filter(pk__in=ids).annotate(distance=access.depth - F("depth")).order_by("depth")
+
+    def tree(self, target: models.Model | int) -> AccessQuerySet:
+        """All accesses to the provided target, ordered depth first (each access being followed by its derived ones).
+
+        :param target: target object or its id.
+        """
+        return self.filter(target=target).tree_order()
+
+    def tree_order(self) -> AccessQuerySet:
+        """Order accesses depth first, using their path. Siblings are ordered by id."""
+        return self.order_by(Concat("path", LPad(Cast("pk", models.CharField()), PATH_WIDTH, models.Value("0"))))
+
+    def granting(self, *perms: str) -> AccessQuerySet:
+        """Filter accesses granting all the provided permissions.
+
+        When grants are encoded (see :py:class:`~.grants.PermissionBit`), this is a bitwise
+        test on :py:attr:`Access.perms`. Otherwise, it uses a JSON keys lookup on grants.
+        """
+        if PermissionBit.is_enabled() and (mask := registry.get_mask(perms)) is not None:
+            return self.alias(perms_granted=F("perms").bitand(mask)).filter(perms_granted=mask)
+        return self.filter(grants__has_keys=list(perms))
+
+    def with_perm(self, perm: str) -> AccessQuerySet:
+        """Filter accesses granting the provided permission.
+
+        When access grants rows are maintained (see :py:class:`~.grants.AccessGrant`), this is
+        a join on their ``(permission, access)`` index. Otherwise, see :py:meth:`granting`.
+        """
+        if AccessGrant.is_enabled():
+            return self.filter(access_grants__permission=perm)
+        return self.granting(perm)
+
+    def save_grants(self, objs: Iterable[Access], replace: bool = True):
+        """Write access grants rows of the provided (saved) accesses, when enabled.
+
+        Accesses without id (eg. from ``bulk_create(ignore_conflicts=True)`` or on backends
+        not returning inserted ids) are fetched by uuid. The ones that are not found haven't
+        been inserted and are skipped.
+
+        :param objs: the accesses
+        :param replace: if True, delete existing rows first.
+        """
+        if not AccessGrant.is_enabled():
+            return
+        objs = list(objs)
+        if missing := [obj for obj in objs if obj.pk is None]:
+            ids = dict(
+                self.model._default_manager.using(self.db)
+                .filter(uuid__in=[obj.uuid for obj in missing])
+                .values_list("uuid", "pk")
+            )
+            for obj in missing:
+                obj.pk = ids.get(obj.uuid)
+        objs = [obj for obj in objs if obj.pk is not None]
+        Grant = self.model.Grant._default_manager.using(self.db)
+        if replace:
+            Grant.filter(access__in=[obj.pk for obj in objs])._raw_delete(self.db)
+        Grant.bulk_create(
+            [
+                self.model.Grant(access_id=obj.pk, permission=perm, reshare=max(reshare, 0))
+                for obj in objs
+                for perm, reshare in (obj.grants or {}).items()
+            ]
+        )
+
+    def rebuild_grants(self, batch_size: int = 1000) -> int:
+        """Rebuild access grants rows of all accesses, returning count of handled accesses.
+
+        :param batch_size: amount of accesses fetched per query.
+        """
+        count, last = 0, 0
+        while objs := list(self.filter(pk__gt=last).order_by("pk").only("pk", "grants")[:batch_size]):
+            with transaction.atomic(using=self.db):
+                self.save_grants(objs)
+            count, last = count + len(objs), objs[-1].pk
+        return count
+
+    def encode_grants(self, batch_size: int = 1000) -> int:
+        """Encode grants of all accesses (eg. once encoding has been enabled), returning count of updated accesses.
+
+        :param batch_size: amount of accesses fetched and updated per query.
+        """
+        count, last = 0, 0
+        while objs := list(self.filter(pk__gt=last).order_by("pk").only("pk", "grants")[:batch_size]):
+            for obj in objs:
+                obj.encode_grants(force=True)
+            models.QuerySet.bulk_update(self, objs, ["perms", "reshares"])
+            count, last = count + len(objs), objs[-1].pk
+        return count
+
+    def revoke(self, chunk_size: int = 500) -> int:
+        """Delete accesses and all their descendants, returning the count of deleted accesses.
+
+        Deletion is run with set-based queries using :py:attr:`Access.path` prefixes, bypassing
+        Django's cascade collector (no row is loaded in memory, no ``pre_delete``/``post_delete``
+        signal is sent). Instead, a single :py:data:`caps.signals.access_revoked` signal is sent.
+
+        :param chunk_size: amount of revoked accesses handled per delete query.
+        """
+        from caps.signals import access_revoked
+
+        count, revoked = 0, []
+        with transaction.atomic(using=self.db):
+            values = list(self.values_list("pk", "path"))
+            for i in range(0, len(values), chunk_size):
+                chunk = values[i : i + chunk_size]
+                count += self._delete_subtrees(chunk)
+                revoked.extend(pk for pk, _ in chunk)
+
+        if revoked:
+            access_revoked.send(sender=self.model, pks=revoked, count=count)
+        return count
+
+    def sweep_expired(self, chunk_size: int = 500, dry_run: bool = False) -> tuple[int, int]:
+        """Delete expired accesses and all their descendants.
+
+        Expired accesses are handled by chunks ordered by (indexed) expiration, each chunk being
+        deleted as by :py:meth:`revoke` in its own transaction. This keeps locks short, so it can
+        be run periodically on large tables. A :py:data:`caps.signals.access_revoked` signal is
+        sent for each chunk.
+
+        :param chunk_size: amount of expired accesses handled per delete query.
+        :param dry_run: if True, only count accesses that would be deleted.
+        :return: the counts of deleted expired accesses and of their deleted descendants.
+        """
+        from caps.signals import access_revoked
+
+        queryset = self.expired().order_by("expiration", "pk")
+        expired, cascaded, seen, last = 0, 0, set(), None
+        while True:
+            if last is not None:
+                queryset = queryset.filter(Q(expiration__gt=last[0]) | Q(expiration=last[0], pk__gt=last[1]))
+            chunk = list(queryset.values_list("pk", "path", "expiration")[:chunk_size])
+            if not chunk:
+                break
+            last = (chunk[-1][2], chunk[-1][0])
+
+            values = [(pk, path) for pk, path, _ in chunk]
+            if dry_run:
+                # as when deleting, descendants of a previous chunk are already removed
+                pks = {pk for pk, _ in values} - seen
+                ids = set(self._subtrees(values).values_list("pk", flat=True)) - seen
+                expired, cascaded = expired + len(pks), cascaded + len(ids) - len(pks)
+                seen |= ids
+                continue
+
+            with transaction.atomic(using=self.db):
+                deleted = self._delete_subtrees(values)
+            expired, cascaded = expired + len(chunk), cascaded + deleted - len(chunk)
+            access_revoked.send(sender=self.model, pks=[pk for pk, *_ in chunk], count=deleted)
+        return expired, cascaded
+
+    def _delete_subtrees(self, values: list[tuple[int, str]]) -> int:
+        """Delete accesses and their descendants for the provided ``(pk, path)`` values, with their grants rows."""
+        subtrees = self._subtrees(values)
+        self.model.Grant._default_manager.using(self.db).filter(access__in=subtrees)._raw_delete(self.db)
+        return subtrees._raw_delete(self.db)
+
+    def _subtrees(self, values: list[tuple[int, str]]) -> AccessQuerySet:
+        """Return all accesses and their descendants for the provided ``(pk, path)`` values."""
+        q = Q(pk__in=[pk for pk, _ in values])
+        for pk, path in values:
+            q |= Q(path__startswith=path + get_path_segment(pk))
+        return self.model._default_manager.using(self.db).filter(q)
+
     def bulk_create(self, objs, *a, **kw):
-        """Check that objects are valid when saving models in bulk."""
-        for obj in objs:
-            obj.is_valid()
-        return super().bulk_create(objs, *a, **kw)
+        """Check that objects are valid and set their tree fields when saving models in bulk.
 
-    # TODO: bulk_update -> is_valid()
+        Origins that are not loaded are fetched in a single query.
+        """
+        objs = list(objs)
+        origins = self.validate(objs)
+        for obj in objs:
+            if obj.origin_id is not None and not obj.path:
+                obj.set_tree(origins.get(obj.origin_id))
+            obj.encode_grants()
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *a, **kw)
+            self.save_grants(objs, replace=False)
+        return objs
+
+    def bulk_update(self, objs, fields, *a, **kw):
+        """Check that objects are valid when updating models in bulk.
+
+        Origins that are not loaded are fetched in a single query. Tree fields
+        are not updated: origin of an existing access is not expected to change.
+        """
+        objs = list(objs)
+        self.validate(objs)
+        if "grants" in fields and PermissionBit.is_enabled():
+            for obj in objs:
+                obj.encode_grants()
+            fields = [*fields, "perms", "reshares"]
+        with transaction.atomic(using=self.db, savepoint=False):
+            count = super().bulk_update(objs, fields, *a, **kw)
+            if "grants" in fields:
+                self.save_grants(objs)
+        return count
+
+    def validate(self, objs: Iterable[Access]) -> dict[int, tuple]:
+        """Check validity of many accesses at once, comparing ids only.
+
+        :returns: values of the origins that have been fetched, by pk (see :py:meth:`Access.get_origin_values`).
+        :yield ValueError: when an access is invalid.
+        """
+        objs = list(objs)
+        missing = {
+            obj.origin_id for obj in objs if obj.origin_id is not None and "origin" not in obj._state.fields_cache
+        }
+        origins = {}
+        if missing:
+            values = (
+                self.model._default_manager.using(self.db).filter(pk__in=missing).values_list(*self.model.ORIGIN_VALUES)
+            )
+            origins = {v[0]: v for v in values}
+        for obj in objs:
+            obj.is_valid(origin=origins.get(obj.origin_id))
+        return origins
 
 
-class Access(models.Model):
+class Access(models.Model, metaclass=AccessBase):
     """Access are the entry point to access an :py:class:`Owned`.
 
     Access provides a set of capabilities for specific receiver.
@@ -108,7 +437,12 @@ class Access(models.Model):
     - derived: access derived from root or another derived. Created
       from the :py:meth:`derive` method.
 
-    This class enforce fields validation at `save()` and `bulk_create()`.
+    The accesses chain is materialized by the :py:attr:`root`, :py:attr:`depth` and
+    :py:attr:`path` fields, maintained at :py:meth:`save`, :py:meth:`get_share` and
+    ``bulk_create()``. This allows to query a whole subtree in a single query
+    (see :py:meth:`AccessQuerySet.subtree`).
+
+    This class enforce fields validation at `save()`, `bulk_create()` and `bulk_update()`.
 
     Concrete Access
     ------------------
@@ -119,8 +453,8 @@ class Access(models.Model):
     by a concrete model.
     """
 
-    uuid = models.UUIDField(_("Id"), default=uuid.uuid4, db_index=True)
-    """Public access id used in API."""
+    uuid = models.UUIDField(_("Id"), default=uuid.uuid4)
+    """Public access id used in API (indexed with receiver, see :py:meth:`AccessBase.get_access_indexes`)."""
     origin = models.ForeignKey(
         "self",
         models.CASCADE,
@@ -130,14 +464,33 @@ class Access(models.Model):
         verbose_name=_("Origin"),
     )
     """Source access in accesses chain."""
+    root = models.ForeignKey(
+        "self",
+        models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name=_("Root"),
+        editable=False,
+    )
+    """First access of the accesses chain (None for root accesses)."""
+    depth = models.PositiveIntegerField(_("Depth"), default=0, editable=False)
+    """Distance to the root access of the chain."""
+    path = models.CharField(_("Path"), max_length=512, blank=True, default="", db_index=True, editable=False)
+    """Materialized path of ancestors' ids, from the root, as ``"root_id/.../origin_id/"``.
+    Ids are zero padded (see :py:func:`~caps.utils.get_path_segment`).
+
+    Descendants of an access are the ones whose path starts with its :py:attr:`subtree_path`.
+    """
     emitter = models.ForeignKey(Agent, models.CASCADE, verbose_name=_("Emitter"), related_name="+", db_index=True)
     """Agent receiving capability."""
-    receiver = models.ForeignKey(Agent, models.CASCADE, verbose_name=_("Receiver"), related_name="+", db_index=True)
-    """Agent receiving capability."""
+    receiver = models.ForeignKey(Agent, models.CASCADE, verbose_name=_("Receiver"), related_name="+", db_index=False)
+    """Agent receiving capability (indexed with expiration, see :py:meth:`AccessBase.get_access_indexes`)."""
     expiration = models.DateTimeField(
         _("Expiration"),
         null=True,
         blank=True,
+        db_index=True,
         help_text=_("Defines an expiration date after which the access is not longer valid."),
     )
     """Date of expiration."""
@@ -146,9 +499,16 @@ class Access(models.Model):
 
     The integer value of ``allowed_reshare`` determines the amount of reshare can be done.
     """
+    perms = models.BigIntegerField(_("Permissions mask"), default=0, editable=False)
+    """Encoded grants: mask of granted permissions' bits (see :py:class:`~.grants.PermissionBit`)."""
+    reshares = models.BinaryField(_("Reshares"), default=b"", editable=False)
+    """Encoded grants: reshare count of granted permissions, one byte per bit."""
 
     objects = AccessQuerySet.as_manager()
 
+    ORIGIN_VALUES = ("pk", "receiver_id", "root_id", "depth", "path")
+    """Origin's values used for validation and tree fields, fetched in a single query."""
+
     class Meta:
         abstract = True
         verbose_name = _("Access")
@@ -160,6 +520,48 @@ class Access(models.Model):
         """Return True if Access is expired."""
         return self.expiration is not None and self.expiration <= tz.now()
 
+    @property
+    def subtree_path(self) -> str:
+        """Path prefix of all accesses derived from this one."""
+        return self.path + get_path_segment(self.pk)
+
+    def get_origin_values(self, origin: Access | tuple | None = None) -> tuple | None:
+        """Return origin's values as listed by :py:attr:`ORIGIN_VALUES`, or None for a root access.
+
+        :param origin: origin access or its values; fetched if not provided and not loaded.
+        """
+        if self.origin_id is None:
+            return None
+        if origin is None:
+            if "origin" in self._state.fields_cache:
+                origin = self.origin
+            else:
+                origin = type(self).objects.values_list(*self.ORIGIN_VALUES).get(pk=self.origin_id)
+        if isinstance(origin, Access):
+            origin = tuple(getattr(origin, attr) for attr in self.ORIGIN_VALUES)
+        return origin
+
+    def set_tree(self, origin: Access | tuple | None = None):
+        """Set :py:attr:`root`, :py:attr:`depth` and :py:attr:`path` from origin.
+
+        :param origin: origin access or its values (see :py:meth:`get_origin_values`).
+        :raises ValueError: the path would exceed its column size.
+        """
+        if (origin := self.get_origin_values(origin)) is None:
+            self.root_id, self.depth, self.path = None, 0, ""
+            return
+
+        pk, _, root_id, depth, path = origin
+        path += get_path_segment(pk)
+        if len(path) > (max_length := self._meta.get_field("path").max_length):
+            raise ValueError(f"Accesses chain is too deep (maximum depth: {max_length // (PATH_WIDTH + 1)}).")
+        self.root_id, self.depth, self.path = root_id or pk, depth + 1, path
+
+    @classmethod
+    def get_concrete_models(cls) -> list[type[Access]]:
+        """Return all installed concrete Access models."""
+        return [model for model in apps.get_models() if issubclass(model, cls)]
+
     @classmethod
     def get_object_class(cls):
         """Return related Owned class."""
@@ -167,25 +569,68 @@ class Access(models.Model):
 
     def has_perm(self, user: User, permission: str) -> bool:
         """Return True if access grants the provided permission."""
-        return self.receiver.is_agent(user) and permission in self.grants
+        return self.receiver.is_agent(user) and self.has_grant(permission)
+
+    async def ahas_perm(self, user: User, permission: str) -> bool:
+        """Return True if access grants the provided permission (async)."""
+        return self.has_grant(permission) and await (await aget_related(self, "receiver")).ais_agent(user)
 
     def get_all_permissions(self, user: User) -> set[str]:
         """Return allowed permissions for this user."""
-        return self.receiver.is_agent(user) and set(self.grants.keys()) or set()
+        return self.receiver.is_agent(user) and set(self.get_grants().keys()) or set()
 
-    def is_valid(self, raises: bool = False) -> bool:
+    async def aget_all_permissions(self, user: User) -> set[str]:
+        """Return allowed permissions for this user (async)."""
+        if await (await aget_related(self, "receiver")).ais_agent(user):
+            return set((await self.aget_grants()).keys())
+        return set()
+
+    def has_grant(self, permission: str, load: bool = False) -> bool:
+        """Return True if the permission is granted, using encoded grants when enabled.
+
+        :param load: allow fetching the permissions registry from database (it never interns permissions).
+        """
+        if PermissionBit.is_enabled() and (bit := registry.get_bit(permission, load)) is not None:
+            return bool(self.perms & (1 << bit))
+        return permission in self.grants
+
+    def get_grants(self) -> dict[str, int]:
+        """Return :py:attr:`grants`, decoded from encoded grants when the field has been deferred."""
+        if PermissionBit.is_enabled() and "grants" in self.get_deferred_fields():
+            return registry.decode(self.perms, self.reshares)
+        return self.grants
+
+    async def aget_grants(self) -> dict[str, int]:
+        """Return :py:attr:`grants` (async), see :py:meth:`get_grants`."""
+        if PermissionBit.is_enabled() and "grants" in self.get_deferred_fields():
+            if not registry.loaded or self.perms & ~registry.mask:
+                await registry.aload()
+        return self.get_grants()
+
+    def encode_grants(self, force: bool = False):
+        """Set :py:attr:`perms` and :py:attr:`reshares` from :py:attr:`grants` when encoding is enabled.
+
+        :param force: encode even if encoding is not enabled.
+        """
+        if force or PermissionBit.is_enabled():
+            self.perms, self.reshares = registry.encode(self.grants or {})
+
+    def is_valid(self, raises: bool = False, origin: Access | tuple | None = None) -> bool:
         """Check Access values validity, throwing exception on invalid
         values.
 
+        Only ids are compared, so no related object is loaded.
+
+        :param origin: origin access or its values (see :py:meth:`get_origin_values`).
         :returns True if valid, otherwise raise ValueError
         :yield ValueError: when access is invaldi
         """
-        if self.origin:
-            if self.origin.receiver != self.emitter:
+        if (origin := self.get_origin_values(origin)) is not None:
+            if origin[1] != self.emitter_id:
                 raise ValueError("origin's receiver and self's emitter are different")
         return True
 
-    def share(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs):
+    def share(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs):
         """Create a new saved access shared from self.
 
         See :py:meth:`get_share` for arguments.
@@ -194,7 +639,7 @@ class Access(models.Model):
         obj.save()
         return obj
 
-    async def ashare(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs):
+    async def ashare(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs):
         """Create a new saved access shared from self (async).
 
         See :py:meth:`get_share` for arguments.
@@ -203,10 +648,52 @@ class Access(models.Model):
         await obj.asave()
         return obj
 
-    def get_share(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs):
+    def share_many(
+        self, receivers: Iterable[Agent | uuid.UUID | str], grants: dict[str, int] | None = None, **kwargs
+    ) -> list[Access]:
+        """Create new saved accesses shared from self to many receivers at once.
+
+        Grants are computed once, receivers' uuids are resolved in a single query and
+        accesses are saved with a single ``bulk_create``.
+
+        See :py:meth:`get_share` for arguments.
+        :yield Agent.DoesNotExist: when a receiver's uuid does not match any agent.
+        """
+        grants = self.get_share_grants(grants)
+        if not grants:
+            raise PermissionDenied("Share not allowed.")
+
+        objs = []
+        for receiver in Agent.objects.get_many(receivers):
+            obj = type(self)(grants=dict(grants), **self.get_share_kwargs(receiver, dict(kwargs)))
+            obj.set_tree(self)
+            objs.append(obj)
+        return type(self).objects.bulk_create(objs)
+
+    async def ashare_many(
+        self, receivers: Iterable[Agent | uuid.UUID | str], grants: dict[str, int] | None = None, **kwargs
+    ) -> list[Access]:
+        """Create new saved accesses shared from self to many receivers at once (async).
+
+        See :py:meth:`share_many`.
+        """
+        grants = self.get_share_grants(grants)
+        if not grants:
+            raise PermissionDenied("Share not allowed.")
+
+        objs = []
+        for receiver in await Agent.objects.aget_many(receivers):
+            obj = type(self)(grants=dict(grants), **self.get_share_kwargs(receiver, dict(kwargs)))
+            obj.set_tree(self)
+            objs.append(obj)
+        return await type(self).objects.abulk_create(objs)
+
+    def get_share(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs):
         """Return new access shared from self. The object is not saved.
 
-        :param receiver: the receiver
+        It only uses foreign keys' ids, so no query is run: saving it is a single INSERT.
+
+        :param receiver: the receiver or its id
         :param grants: optional granted permissions
         :param **kwargs: extra initial arguments
         :yield PermissionDenied: when access expired or no grant is shareable.
@@ -215,11 +702,17 @@ class Access(models.Model):
         if not grants:
             raise PermissionDenied("Share not allowed.")
         kwargs = self.get_share_kwargs(receiver, kwargs)
-        return type(self)(grants=grants, **kwargs)
+        obj = type(self)(grants=grants, **kwargs)
+        obj.set_tree(self)
+        return obj
+
+    def get_share_kwargs(self, receiver: Agent | int, kwargs):
+        """Return initial argument for a derived access from self.
 
-    def get_share_kwargs(self, receiver: Agent, kwargs):
-        """Return initial argument for a derived access from self."""
+        Relations are provided as ids when they are not loaded, so no query is run.
+        """
         e_key, emitter = get_lazy_relation(self, "receiver", "emitter")
+        t_key, target = get_lazy_relation(self, "target")
 
         if self.expiration:
             if self.is_expired:
@@ -232,10 +725,10 @@ class Access(models.Model):
 
         return {
             **kwargs,
-            "receiver": receiver,
+            "receiver" if isinstance(receiver, Agent) else "receiver_id": receiver,
             e_key: emitter,
             "origin": self,
-            "target": self.target,
+            t_key: target,
         }
 
     def get_share_grants(self, grants: dict[str, int] | None = None, **kwargs) -> dict[str, int]:
@@ -246,6 +739,13 @@ class Access(models.Model):
             }
         return {key: value - 1 for key, value in self.grants.items() if value > 0}
 
+    def revoke(self) -> int:
+        """Delete this access and all accesses derived from it.
+
+        See :py:meth:`AccessQuerySet.revoke`.
+        """
+        return type(self).objects.filter(pk=self.pk).revoke()
+
     def get_absolute_url(self):
         if not self.target.detail_url_name:
             raise ValueError("Missing attribute `detail_url_name`.")
@@ -253,8 +753,45 @@ class Access(models.Model):
         return reverse(self.target.detail_url_name, kwargs={"uuid": self.uuid})
 
     def save(self, *a, **kw):
-        self.is_valid(raises=True)
-        return super().save(*a, **kw)
+        origin = self.get_origin_values()
+        self.is_valid(raises=True, origin=origin)
+        if self.origin_id is not None and not self.path:
+            self.set_tree(origin)
+        if not self.has_grants_changed(kw.get("update_fields")):
+            return super().save(*a, **kw)
+
+        self.encode_grants()
+        if PermissionBit.is_enabled() and (update_fields := kw.get("update_fields")) is not None:
+            kw["update_fields"] = {*update_fields, "perms", "reshares"}
+        if not AccessGrant.is_enabled():
+            super().save(*a, **kw)
+        else:
+            adding, using = self._state.adding, kw.get("using") or router.db_for_write(type(self), instance=self)
+            with transaction.atomic(using=using, savepoint=False):
+                super().save(*a, **kw)
+                type(self).objects.using(using).save_grants([self], replace=not adding)
+        self._loaded_grants = dict(self.grants or {})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        if "grants" in obj.__dict__:
+            obj._loaded_grants = dict(obj.grants or {})
+        return obj
+
+    def has_grants_changed(self, update_fields: Iterable[str] | None = None) -> bool:
+        """Return True if grants are to be saved, thus encoded and their rows synced.
+
+        This is the case for new accesses, when ``grants`` is in ``update_fields``, or
+        when they differ from the loaded ones.
+        """
+        if self._state.adding:
+            return True
+        if update_fields is not None:
+            return "grants" in update_fields
+        if "grants" not in self.__dict__:
+            return False
+        return self.grants != self.__dict__.get("_loaded_grants")
 
     def __str__(self):
         return f"{self.emitter} -> {self.receiver}, {self.target.uuid}"
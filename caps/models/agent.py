@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import Iterable, Iterator
 
+from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
-__all__ = ("AgentQuerySet", "Agent")
+from caps import cache
+
+__all__ = ("AgentQuerySet", "Agent", "AgentMembershipQuerySet", "AgentMembership", "AgentSet")
 
 
 class AgentQuerySet(models.QuerySet):
@@ -22,12 +27,122 @@ class AgentQuerySet(models.QuerySet):
             return self.filter(user__isnull=True, group__isnull=True)
         if strict:
             return self.filter(user=user)
+        if cache.get_cache() is not None:
+            return self.filter(pk__in=[pk for pk, *_ in self.resolve(user)])
+        return self._user(user)
+
+    def _user(self, user: User) -> AgentQuerySet:
+        """Filter agents of user (groups included) from database."""
+        if AgentMembership.is_enabled():
+            return self.filter(memberships__user=user)
         return self.filter(Q(user=user) | Q(group__in=user.groups.all())).distinct()
 
+    async def auser(self, user: User, strict: bool = False) -> AgentQuerySet:
+        """Filter by user or its groups (async).
+
+        Only cache lookup is run asynchronously, see :py:meth:`user`.
+        """
+        if not user.is_anonymous and not strict and cache.get_cache() is not None:
+            return self.filter(pk__in=[pk for pk, *_ in await self.aresolve(user)])
+        return self.user(user, strict)
+
+    def resolve(self, user: User) -> list[tuple[int, uuid.UUID, int | None]]:
+        """Return ``(agent_id, agent_uuid, group_id)`` for user's agents (user's group included).
+
+        Result is cached (see :py:mod:`caps.cache`). User's own agent has ``group_id`` set to None.
+        """
+        return cache.get_user_value(user, "agents", lambda: list(self._resolve_query(user)))
+
+    async def aresolve(self, user: User) -> list[tuple[int, uuid.UUID, int | None]]:
+        """Return ``(agent_id, agent_uuid, group_id)`` for user's agents (async).
+
+        See :py:meth:`resolve`.
+        """
+
+        async def loader():
+            return [values async for values in self._resolve_query(user)]
+
+        return await cache.aget_user_value(user, "agents", loader)
+
+    def _resolve_query(self, user: User) -> models.QuerySet:
+        return self.model._default_manager.all()._user(user).values_list("pk", "uuid", "group_id")
+
     def group(self, group: Group) -> AgentQuerySet:
         """Filter by group."""
         return self.filter(group=group)
 
+    def get_many(self, items: Iterable[Agent | uuid.UUID | str]) -> list[Agent]:
+        """Return agents for the provided agents or uuids, fetching uuids in a single query.
+
+        Order is preserved and duplicates are removed.
+
+        :param items: agents instances and/or uuids.
+        :yield Agent.DoesNotExist: when an uuid does not match any agent.
+        """
+        items, uuids = self._get_many_uuids(items)
+        agents = {agent.uuid: agent for agent in self.filter(uuid__in=uuids)} if uuids else {}
+        return self._get_many_result(items, uuids, agents)
+
+    async def aget_many(self, items: Iterable[Agent | uuid.UUID | str]) -> list[Agent]:
+        """Return agents for the provided agents or uuids (async).
+
+        See :py:meth:`get_many`.
+        """
+        items, uuids = self._get_many_uuids(items)
+        agents = {agent.uuid: agent async for agent in self.filter(uuid__in=uuids)} if uuids else {}
+        return self._get_many_result(items, uuids, agents)
+
+    def _get_many_uuids(self, items):
+        items = [item if isinstance(item, Agent) else uuid.UUID(str(item)) for item in items]
+        return items, {item for item in items if not isinstance(item, Agent)}
+
+    def _get_many_result(self, items, uuids, agents):
+        if missing := uuids - agents.keys():
+            raise Agent.DoesNotExist(f"Agents not found: {', '.join(str(u) for u in missing)}")
+        items = [agents.get(item, item) for item in items]
+        return list({agent.pk: agent for agent in items}.values())
+
+    def ensure_for_users(self, users: models.QuerySet | None = None, batch_size: int = 1000) -> int:
+        """Create missing agents of users in bulk.
+
+        :param users: users queryset (defaults to all users)
+        :param batch_size: amount of agents created per query
+        :return the count of created agents.
+        """
+        users = User.objects.all() if users is None else users
+        ids = self._ensure_agents(users, "user_id", batch_size)
+        cache.invalidate_users(ids)
+        return len(ids)
+
+    def ensure_for_groups(self, groups: models.QuerySet | None = None, batch_size: int = 1000) -> int:
+        """Create missing agents of groups in bulk.
+
+        :param groups: groups queryset (defaults to all groups)
+        :param batch_size: amount of agents created per query
+        :return the count of created agents.
+        """
+        groups = Group.objects.all() if groups is None else groups
+        ids = self._ensure_agents(groups, "group_id", batch_size)
+        if ids and cache.get_cache() is not None:
+            cache.invalidate_users(
+                User.groups.through.objects.filter(group_id__in=ids).values_list("user_id", flat=True)
+            )
+        return len(ids)
+
+    def _ensure_agents(self, queryset: models.QuerySet, field: str, batch_size: int) -> list[int]:
+        """Create agents for items of queryset without one, by chunks, returning items' ids."""
+        queryset = queryset.filter(agent__isnull=True).order_by("pk").values_list("pk", flat=True)
+        created, last = [], None
+        while True:
+            query = queryset if last is None else queryset.filter(pk__gt=last)
+            if not (ids := list(query[:batch_size])):
+                return created
+            agents = self.bulk_create([self.model(**{field: pk}) for pk in ids], batch_size=batch_size)
+            if AgentMembership.is_enabled():
+                AgentMembership.objects.add_agents(agents)
+            created.extend(ids)
+            last = ids[-1]
+
 
 class Agent(models.Model):
     """
@@ -56,13 +171,25 @@ class Agent(models.Model):
     def is_agent(self, user: User):
         """Return True if user can act as this agent.
 
-        This methods also check based on user's group and anonymity.
+        This methods also check based on user's group and anonymity. User's groups
+        are cached (see :py:mod:`caps.cache`).
         """
         if user.is_anonymous:
             return self.is_anonymous
-        return self.user_id == user.pk or any(
-            gid == self.group_id for gid in user.groups.all().values_list("pk", flat=True)
-        )
+        if self.user_id is not None:
+            return self.user_id == user.pk
+        return self.group_id is not None and self.group_id in cache.get_user_group_ids(user)
+
+    async def ais_agent(self, user: User):
+        """Return True if user can act as this agent (async).
+
+        See :py:meth:`is_agent`.
+        """
+        if user.is_anonymous:
+            return self.is_anonymous
+        if self.user_id is not None:
+            return self.user_id == user.pk
+        return self.group_id is not None and self.group_id in await cache.aget_user_group_ids(user)
 
     def clean(self):
         if self.user and self.group:
@@ -75,3 +202,185 @@ class Agent(models.Model):
         if self.group:
             return f"Group '{self.group.name}'"
         return "Anonymous"
+
+
+class AgentMembershipQuerySet(models.QuerySet):
+    def add(self, user_ids: Iterable[int], agent_ids: Iterable[int]) -> int:
+        """Create memberships for each user and agent, ignoring existing ones."""
+        agent_ids = list(agent_ids)
+        objs = [self.model(user_id=user_id, agent_id=agent_id) for user_id in user_ids for agent_id in agent_ids]
+        return len(self.bulk_create(objs, ignore_conflicts=True)) if objs else 0
+
+    def add_agents(self, agents: Iterable[Agent]) -> int:
+        """Create memberships of newly created agents (for their user or group's users)."""
+        agents = list(agents)
+        objs = [self.model(user_id=agent.user_id, agent_id=agent.pk) for agent in agents if agent.user_id]
+        if by_group := {agent.group_id: agent.pk for agent in agents if agent.group_id}:
+            rows = User.groups.through.objects.filter(group_id__in=by_group).values_list("user_id", "group_id")
+            objs.extend(self.model(user_id=user_id, agent_id=by_group[group_id]) for user_id, group_id in rows)
+        return len(self.bulk_create(objs, ignore_conflicts=True)) if objs else 0
+
+    def remove(self, user_ids: Iterable[int], agent_ids: Iterable[int]) -> int:
+        """Delete memberships of users to the provided agents."""
+        return self.filter(user_id__in=user_ids, agent_id__in=agent_ids).delete()[0]
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recreate all memberships from users' agents and groups.
+
+        :return the count of created memberships.
+        """
+        user_agents = Agent.objects.filter(user__isnull=False).values_list("user_id", "pk")
+        group_agents = User.groups.through.objects.filter(group__agent__isnull=False).values_list(
+            "user_id", "group__agent"
+        )
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            objs = [self.model(user_id=u, agent_id=a) for u, a in (*user_agents, *group_agents)]
+            return len(self.bulk_create(objs, batch_size=batch_size))
+
+
+class AgentMembership(models.Model):
+    """
+    Denormalized relation between users and the agents they can act as: their own
+    agent and their groups' agents.
+
+    When enabled, :py:meth:`AgentQuerySet.user` resolves user's agents with a single
+    indexed equality lookup on this table, instead of joining user's groups. It is
+    enabled by the ``CAPS_AGENT_MEMBERSHIP`` setting, and kept up to date by
+    :py:mod:`caps.signals` on agent creation and user's groups changes.
+
+    When enabling it on an existing database, run ``caps_ensure_agents --memberships``.
+    """
+
+    user = models.ForeignKey(User, models.CASCADE, related_name="+", verbose_name=_("User"))
+    agent = models.ForeignKey(Agent, models.CASCADE, related_name="memberships", verbose_name=_("Agent"))
+
+    objects = AgentMembershipQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Agent membership")
+        verbose_name_plural = _("Agent memberships")
+        unique_together = (("user", "agent"),)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True when memberships are used and maintained."""
+        return getattr(settings, "CAPS_AGENT_MEMBERSHIP", False)
+
+
+class AgentSet:
+    """
+    Lazy and memoized set of agents a user can act as.
+
+    The underlying query is only run once, on first access, and the result is
+    shared by anything using it during the request (views, serializers,
+    querysets). User's own agent comes first.
+
+    .. code-block:: python
+
+        agents = AgentSet(request.user)
+        # no query yet
+        Post.objects.available(agents)   # use materialized ids
+        agents.agent in agents           # no extra query
+    """
+
+    def __init__(self, user: User, queryset: AgentQuerySet | None = None):
+        self.user = user
+        self.queryset = queryset
+
+    def get_queryset(self) -> AgentQuerySet:
+        """Return the queryset used to fetch agents."""
+        if self.queryset is not None:
+            return self.queryset
+        return Agent.objects.user(self.user)
+
+    @cached_property
+    def agents(self) -> list[Agent]:
+        """Agents list, with user's agent first.
+
+        When cache is enabled, agents are built from :py:meth:`AgentQuerySet.resolve` without hitting the database.
+        """
+        if self.use_cache:
+            agents = self.from_resolved(Agent.objects.resolve(self.user))
+        else:
+            agents = self.get_queryset()
+        return self.sort(agents)
+
+    async def aload(self) -> AgentSet:
+        """Fetch agents asynchronously if not yet loaded, returning self.
+
+        This must be called before using the set from an async context.
+        """
+        if not self.is_loaded:
+            if self.use_cache:
+                agents = self.from_resolved(await Agent.objects.aresolve(self.user))
+            else:
+                agents = [agent async for agent in self.get_queryset()]
+            self.__dict__["agents"] = self.sort(agents)
+        return self
+
+    @property
+    def use_cache(self) -> bool:
+        """Return True when agents are built from cached resolved values."""
+        return self.queryset is None and self.user.pk is not None and cache.get_cache() is not None
+
+    def from_resolved(self, resolved: list[tuple[int, uuid.UUID, int | None]]) -> list[Agent]:
+        """Return agents instances from :py:meth:`AgentQuerySet.resolve` values."""
+        db, fields, user_id = Agent.objects.db, ["id", "uuid", "user_id", "group_id"], self.user.pk
+        return [
+            Agent.from_db(db, fields, (pk, uuid_, None if group_id else user_id, group_id))
+            for pk, uuid_, group_id in resolved
+        ]
+
+    def sort(self, agents: Iterable[Agent]) -> list[Agent]:
+        """Return agents as a list, user's agent first."""
+        user_id = self.user.pk
+        return sorted(agents, key=lambda a: user_id is None or a.user_id != user_id)
+
+    @cached_property
+    def ids(self) -> list[int]:
+        """Agents' ids."""
+        return [agent.pk for agent in self.agents]
+
+    @property
+    def agent(self) -> Agent | None:
+        """User's own agent, or anonymous one for anonymous user."""
+        if self.user.is_anonymous:
+            return self.agents[0] if self.agents else None
+        return next((a for a in self.agents if a.user_id == self.user.pk), None)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Return True when agents have been fetched."""
+        return "agents" in self.__dict__
+
+    def add(self, agent: Agent):
+        """Add an agent to the set (eg. newly created user's agent), without refetching."""
+        if agent in self:
+            return
+        if agent.user_id is not None and agent.user_id == self.user.pk:
+            self.agents.insert(0, agent)
+        else:
+            self.agents.append(agent)
+        self.__dict__.pop("ids", None)
+
+    def __iter__(self) -> Iterator[Agent]:
+        return iter(self.agents)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def __bool__(self) -> bool:
+        return bool(self.agents)
+
+    def __getitem__(self, index):
+        return self.agents[index]
+
+    def __contains__(self, agent: Agent | int) -> bool:
+        pk = agent if isinstance(agent, int) else getattr(agent, "pk", None)
+        return pk is not None and pk in self.ids
+
+    def __repr__(self) -> str:
+        if self.is_loaded:
+            return f"<AgentSet {self.agents!r}>"
+        return f"<AgentSet (lazy) user={self.user!r}>"
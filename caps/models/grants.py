@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+__all__ = ("PermissionBitQuerySet", "PermissionBit", "PermissionRegistry", "registry", "AccessGrant")
+
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionBitQuerySet(models.QuerySet):
+    """QuerySet for PermissionBit."""
+
+    def intern(self, names: Iterable[str]) -> dict[str, int]:
+        """Assign bits to the provided permissions if they don't have one yet, returning all interned ones.
+
+        Bits are allocated after the highest one in use. Concurrent allocations are resolved by
+        the unique constraints, retrying until all names are interned or no bit is left.
+
+        :param names: permissions as ``"app_label.codename"``.
+        :return: a dict of ``{permission: bit}``.
+        """
+        names = set(names)
+        while True:
+            bits = dict(self.values_list("name", "bit"))
+            missing = sorted(names - bits.keys())
+            start = max(bits.values(), default=-1) + 1
+            missing = missing[: max(PermissionBit.MAX_BITS - start, 0)]
+            if not missing:
+                return bits
+            self.bulk_create(
+                [PermissionBit(name=name, bit=start + i) for i, name in enumerate(missing)], ignore_conflicts=True
+            )
+
+
+class PermissionBit(models.Model):
+    """
+    Permission interned to a small integer, used as bit position in encoded grants
+    (:py:attr:`~.access.Access.perms` and :py:attr:`~.access.Access.reshares`).
+
+    Bits are stored in database in order to be stable across processes and deployments,
+    whatever permissions are added to ``root_grants``. They are allocated by the
+    :py:data:`registry`.
+
+    Encoding is enabled by the ``CAPS_GRANTS_ENCODING`` setting. When enabling it on an
+    existing database, run ``caps_encode_grants``.
+    """
+
+    MAX_BITS = 63
+    """Amount of permissions that can be encoded (signed 64 bits mask)."""
+
+    name = models.CharField(_("Permission"), max_length=255, unique=True)
+    bit = models.PositiveSmallIntegerField(_("Bit"), unique=True)
+
+    objects = PermissionBitQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Permission bit")
+        verbose_name_plural = _("Permission bits")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True when grants are encoded and used."""
+        return getattr(settings, "CAPS_GRANTS_ENCODING", False)
+
+
+class PermissionRegistry:
+    """
+    In-process registry of interned permissions, loaded lazily from :py:class:`PermissionBit`.
+
+    Permissions of Owned models' ``root_grants`` are registered at app ready, so they are
+    interned first, once grants are encoded. Other permissions are interned on demand when
+    grants are encoded: reading grants never writes to the database. A
+    permission unknown to the registry is never used to read encoded grants: callers then
+    fall back to the ``grants`` JSON field.
+
+    Only :py:attr:`PermissionBit.MAX_BITS` permissions can be interned: grants of other ones
+    are not encoded.
+    """
+
+    def __init__(self):
+        self.pending = set()
+        self.clear()
+
+    def clear(self):
+        """Drop loaded bits, which are fetched again on next use."""
+        self.bits: dict[str, int] = {}
+        self.names: dict[int, str] = {}
+        self.mask = 0
+        self.overflow: set[str] = set()
+        self.loaded = False
+
+    def register(self, names: Iterable[str]):
+        """Register permissions to intern on next load."""
+        self.pending.update(names)
+        self.loaded = False
+
+    def load(self, names: Iterable[str] = (), intern: bool = True):
+        """Load bits from database, interning pending and provided permissions.
+
+        :param intern: if False, only fetch interned permissions, without writing any.
+        """
+        if not intern:
+            self.set_bits(dict(PermissionBit.objects.values_list("name", "bit")))
+            return
+
+        names = self.pending.union(names)
+        self.set_bits(PermissionBit.objects.intern(names))
+        if overflow := names - self.bits.keys() - self.overflow:
+            self.overflow |= overflow
+            logger.warning("Too many permissions to encode grants, not encoded: %s", ", ".join(sorted(overflow)))
+        self.pending.clear()
+
+    async def aload(self):
+        """Fetch interned permissions from database, without interning any (async)."""
+        self.set_bits({name: bit async for name, bit in PermissionBit.objects.values_list("name", "bit")})
+
+    def set_bits(self, bits: dict[str, int]):
+        """Set loaded bits."""
+        self.bits = bits
+        self.names = {bit: name for name, bit in bits.items()}
+        self.mask = sum(1 << bit for bit in self.names)
+        self.loaded = True
+
+    def get_bit(self, name: str, load: bool = True) -> int | None:
+        """Return permission's bit or None if not interned.
+
+        Permissions are never interned here: this is only done when encoding grants.
+
+        :param load: fetch bits from database if not yet done.
+        """
+        if load and not self.loaded:
+            self.load(intern=False)
+        return self.bits.get(name)
+
+    def get_mask(self, names: Iterable[str]) -> int | None:
+        """Return mask of the provided permissions, or None if any is not interned."""
+        mask = 0
+        for name in names:
+            if (bit := self.get_bit(name)) is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def encode(self, grants: dict[str, int]) -> tuple[int, bytes]:
+        """Return ``(perms, reshares)`` values for the provided grants.
+
+        ``reshares`` has one byte per bit up to the highest granted one, holding
+        the (capped) reshare count.
+        """
+        if not self.loaded or grants.keys() - self.bits.keys() - self.overflow:
+            self.load(grants.keys())
+
+        mask, reshares = 0, bytearray()
+        for name, reshare in grants.items():
+            if (bit := self.bits.get(name)) is None:
+                continue
+            mask |= 1 << bit
+            if len(reshares) <= bit:
+                reshares.extend(bytes(bit + 1 - len(reshares)))
+            reshares[bit] = min(max(reshare, 0), 255)
+        return mask, bytes(reshares)
+
+    def decode(self, mask: int, reshares: bytes) -> dict[str, int]:
+        """Return grants for the provided encoded values."""
+        if not self.loaded or mask & ~self.mask:
+            # bits may have been interned by another process
+            self.load(intern=False)
+        reshares = bytes(reshares)
+        return {
+            name: reshares[bit] if bit < len(reshares) else 0 for bit, name in self.names.items() if mask & (1 << bit)
+        }
+
+
+registry = PermissionRegistry()
+"""Registry of interned permissions."""
+
+
+class AccessGrant(models.Model):
+    """
+    Normalized grant of an access, as a ``(access, permission, reshare)`` row.
+
+    It allows filtering accesses (and objects) by granted permission in SQL, using
+    the ``(permission, access)`` index (see :py:meth:`~.access.AccessQuerySet.with_perm`).
+
+    The concrete model is created for each concrete :py:class:`~.access.Access` model
+    as its ``Grant`` member, with the ``access`` foreign key. Rows are written by
+    ``save()``, ``bulk_create()`` and ``bulk_update()`` of accesses when enabled by the
+    ``CAPS_ACCESS_GRANTS`` setting. When enabling it on an existing database, run
+    ``caps_encode_grants --table``.
+    """
+
+    permission = models.CharField(_("Permission"), max_length=255)
+    reshare = models.PositiveSmallIntegerField(_("Reshare"), default=0)
+
+    class Meta:
+        abstract = True
+        verbose_name = _("Access grant")
+        verbose_name_plural = _("Access grants")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Return True when access grants rows are maintained and used."""
+        return getattr(settings, "CAPS_ACCESS_GRANTS", False)
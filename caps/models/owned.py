@@ -1,16 +1,19 @@
 from __future__ import annotations
-from uuid import uuid4
+from uuid import UUID, uuid4
 from typing import Iterable
 
+from django.conf import settings
 from django.db import models
-from django.db.models import Q, OuterRef, Prefetch, Subquery
+from django.db.models import Exists, F, FilteredRelation, Q, OuterRef, Prefetch, Subquery
+from django.db.models.query import ModelIterable
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.models import Permission
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
-from .agent import Agent
+from caps.utils import aget_related, get_lazy_relation
+from .agent import Agent, AgentSet
 from .access import Access, AccessQuerySet
 from .nested import NestedModelBase
 
@@ -35,7 +38,8 @@ class OwnedBase(NestedModelBase):
                 "target": models.ForeignKey(
                     new_class,
                     models.CASCADE,
-                    db_index=True,
+                    # indexed by the (target, receiver) index
+                    db_index=False,
                     related_name="accesses",
                     verbose_name=_("Target"),
                 ),
@@ -47,38 +51,150 @@ class OwnedBase(NestedModelBase):
 class OwnedQuerySet(models.QuerySet):
     """QuerySet for Owneds."""
 
-    def available(self, agents: Agent | Iterable[Agent], accesses: AccessQuerySet | None = None):
+    strategies = ("exists", "union", "or")
+    """Available strategies for :py:meth:`available`."""
+
+    def available(
+        self,
+        agents: Agent | Iterable[Agent],
+        accesses: AccessQuerySet | None = None,
+        strategy: str | None = None,
+        join: bool = False,
+    ):
         """
         Return object available to provided agents as owner or receiver (when ``accesses`` is provided).
 
         It prefetch/annotates the resulting items using :py:meth:`access`, if accesses is provided.
 
+        Objects are filtered using one of these strategies:
+
+        - ``"exists"``: owner lookup or an ``EXISTS`` subquery on accesses (default);
+        - ``"union"``: ids in the ``UNION`` of owned objects' and accessible objects' ids;
+        - ``"or"``: owner lookup or a join on accesses. This may return duplicates when an
+          object has many matching accesses.
+
+        The default strategy can be set by the ``CAPS_AVAILABLE_STRATEGY`` setting. It used
+        to be ``"or"``: set the setting to it in order to keep the previous behaviour.
+
         :param agents: for the provided agent
         :param accesses: use this queryset for accesses
+        :param strategy: filtering strategy.
+        :param join: join accesses instead of prefetching them (see :py:meth:`access`).
+        :raises ValueError: invalid strategy.
         """
+        if isinstance(agents, AgentSet):
+            agents = agents.ids
+
+        owner_q = Q(owner=agents) if isinstance(agents, Agent) else Q(owner__in=agents)
         if accesses is None or accesses.query.is_empty():
-            if isinstance(agents, Agent):
-                return self.filter(owner=agents)
-            return self.filter(owner__in=agents)
+            return self.filter(owner_q)
 
+        strategy = strategy or getattr(settings, "CAPS_AVAILABLE_STRATEGY", "exists")
         accesses = accesses.receiver(agents).expired(exclude=True)
-        if isinstance(agents, Agent):
-            q = Q(owner=agents) | Q(accesses__in=accesses)
+        if strategy == "exists":
+            q = owner_q | Exists(accesses.filter(target=OuterRef("pk")))
+        elif strategy == "union":
+            # compound statements don't allow ordered subqueries
+            owned = self.model._default_manager.filter(owner_q).values("pk").order_by()
+            q = Q(pk__in=owned.union(accesses.values("target").order_by()))
+        elif strategy == "or":
+            q = owner_q | Q(accesses__in=accesses)
         else:
-            q = Q(owner__in=agents) | Q(accesses__in=accesses)
-        return self.access(accesses).filter(q)
+            raise ValueError(f"Invalid strategy `{strategy}`, must be one of: {', '.join(self.strategies)}")
+        return self.access(accesses, join=join).filter(q)
+
+    def with_perm(self, perm: str, agents: Agent | Iterable[Agent] | None = None) -> OwnedQuerySet:
+        """Filter objects on which the provided permission is granted, in SQL.
+
+        Objects match when shared by a non expired access granting the permission (see
+        :py:meth:`~.access.AccessQuerySet.with_perm`). When ``agents`` are provided, objects
+        owned by them also match if the permission is in ``root_grants``.
+
+        :param perm: the permission
+        :param agents: only consider objects owned by or shared to these agents.
+        """
+        accesses = self.model.Access.objects.with_perm(perm).expired(exclude=True)
+        if agents is None:
+            return self.filter(pk__in=accesses.values("target"))
+
+        if isinstance(agents, AgentSet):
+            agents = agents.ids
+        q = Q(pk__in=accesses.receiver(agents).values("target"))
+        if perm in self.model.root_grants:
+            q |= Q(owner=agents) if isinstance(agents, Agent) else Q(owner__in=agents)
+        return self.filter(q)
+
+    def with_permissions(self, agents: Agent | Iterable[Agent]) -> OwnedQuerySet:
+        """Annotate objects with their effective grants for the provided agents.
+
+        Items are annotated with:
+
+        - ``agent_grants``: ``root_grants`` when owned by one of the agents, otherwise the grants
+          of a non expired access received by one of them (None if there is none);
+        - ``agent_user_id`` and ``agent_group_id``: the owner or receiver granting them.
 
-    def access(self, access: AccessQuerySet | Access, strict: bool = False) -> OwnedQuerySet:
+        Those are used by :py:meth:`Owned.has_perm` and :py:meth:`Owned.get_all_permissions`
+        (thus :py:class:`~caps.backends.PermissionsBackend`), which don't run any further query.
+
+        :param agents: for the provided agents
+        """
+        if isinstance(agents, AgentSet):
+            agents = agents.ids
+
+        owner_q = Q(owner=agents) if isinstance(agents, Agent) else Q(owner__in=agents)
+        accesses = (
+            self.model.Access.objects.receiver(agents)
+            .expired(exclude=True)
+            .filter(target=OuterRef("pk"))
+            .order_by("pk")
+        )
+        return self.annotate(
+            agent_grants=models.Case(
+                models.When(owner_q, then=models.Value(self.model.root_grants, output_field=models.JSONField())),
+                default=Subquery(accesses.values("grants")[:1]),
+                output_field=models.JSONField(),
+            ),
+            agent_user_id=models.Case(
+                models.When(owner_q, then=F("owner__user_id")),
+                default=Subquery(accesses.values("receiver__user_id")[:1]),
+                output_field=models.IntegerField(),
+            ),
+            agent_group_id=models.Case(
+                models.When(owner_q, then=F("owner__group_id")),
+                default=Subquery(accesses.values("receiver__group_id")[:1]),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    async def aavailable_list(
+        self, agents: Agent | Iterable[Agent], accesses: AccessQuerySet | None = None, strategy: str | None = None
+    ) -> list[Owned]:
+        """Return the list of objects available to provided agents (async).
+
+        See :py:meth:`available`. An :py:class:`~.agent.AgentSet` is loaded asynchronously.
+        """
+        if isinstance(agents, AgentSet):
+            agents = (await agents.aload()).ids
+        return [obj async for obj in self.available(agents, accesses, strategy)]
+
+    def access(self, access: AccessQuerySet | Access, strict: bool = False, join: bool = False) -> OwnedQuerySet:
         """Prefetch object with accesses from the provided queryset (as ``agent_accesses``).
 
         The items are annotated with ``access_uuid`` corresponding to the access.
 
+        By default, the access uuid is annotated with a subquery and accesses are prefetched
+        in a second query. In join mode, the matching access is instead joined in the same
+        query (see :py:meth:`access_join`).
+
         :param access: use this Access QuerySet or instance
         :param strict: if True, filter only items with prefetched access
+        :param join: use join mode.
         :return: the annotated and prefetched queryset.
         """
         if isinstance(access, self.model.Access):
             access = self.model.Access.objects.filter(pk=access.pk)
+        if join:
+            return self.access_join(access, strict)
 
         fk_field = self.model.Access._meta.get_field("target")
         lookup = fk_field.remote_field.get_accessor_name()
@@ -88,6 +204,50 @@ class OwnedQuerySet(models.QuerySet):
         self = self.annotate(access_uuid=Subquery(access.values("uuid")[:1])).prefetch_related(prefetch)
         return self.filter(access_uuid__isnull=False) if strict else self
 
+    def access_join(self, access: AccessQuerySet, strict: bool = False) -> OwnedQuerySet:
+        """Join accesses from the provided queryset, in a single query.
+
+        The access columns are selected as ``access_{column}`` annotations (such as
+        ``access_uuid``), from which :py:attr:`Owned.access` is set when items are fetched.
+
+        Only one access is joined per object, the matching one with the lowest id, so that
+        objects are returned once even when many accesses match (eg. for a user's agent and
+        its groups' ones).
+
+        :param access: use this Access QuerySet
+        :param strict: if True, filter only items with an access.
+        """
+        fk_field = self.model.Access._meta.get_field("target")
+        lookup = fk_field.remote_field.get_accessor_name()
+        first = access.filter(target=OuterRef("pk")).order_by("pk").values("pk")[:1]
+        relation = FilteredRelation(lookup, condition=Q(**{f"{lookup}__pk": Subquery(first)}))
+        columns = {
+            f"access_{field.attname}": F(f"agent_access__{field.attname}")
+            for field in self.model.Access._meta.concrete_fields
+        }
+        self = self.alias(agent_access=relation).annotate(**columns)
+        if strict:
+            self = self.filter(**{f"access_{self.model.Access._meta.pk.attname}__isnull": False})
+        self._iterable_class = AccessJoinIterable
+        return self
+
+
+class AccessJoinIterable(ModelIterable):
+    """Yield objects of :py:meth:`OwnedQuerySet.access_join`, setting their access from joined columns."""
+
+    def __iter__(self):
+        model = self.queryset.model.Access
+        names = [field.attname for field in model._meta.concrete_fields]
+        for obj in super().__iter__():
+            values = [getattr(obj, f"access_{name}", None) for name in names]
+            if values[names.index(model._meta.pk.attname)] is None:
+                obj.agent_accesses = []
+            else:
+                access = model.from_db(self.queryset.db, names, values)
+                model.target.field.set_cached_value(access, obj)
+                obj.agent_accesses = [access]
+            yield obj
+
 
 class Owned(models.Model, metaclass=OwnedBase):
     """An object accessible through Accesss.
@@ -144,33 +304,76 @@ class Owned(models.Model, metaclass=OwnedBase):
         Lookup for declared permissions of :py:attr:`root_grants`, raising ValueError if
         there are declared permissions not present in database.
         """
+        keys, perms = cls._root_grants_query()
+        cls._check_root_grants(keys, set(perms))
+
+    @classmethod
+    async def acheck_root_grants(cls):
+        """Lookup for declared permissions of :py:attr:`root_grants` (async).
+
+        See :py:meth:`check_root_grants`.
+        """
+        keys, perms = cls._root_grants_query()
+        cls._check_root_grants(keys, {perm async for perm in perms})
+
+    @classmethod
+    def _root_grants_query(cls):
         keys = set()
         q = Q()
         for key in cls.root_grants.keys():
             app_label, codename = key.split(".", 1)
             q |= Q(content_type__app_label=app_label, codename=codename)
             keys.add((app_label, codename))
+        return keys, Permission.objects.filter(q).values_list("content_type__app_label", "codename")
 
-        perms = set(Permission.objects.filter(q).values_list("content_type__app_label", "codename"))
-
+    @classmethod
+    def _check_root_grants(cls, keys, perms):
         if delta := (keys - perms):
-            raise ValueError(
-                f"`{cls.__name__}.root_grants` has permissions not present in the database: {', '.join(delta)}"
-            )
+            delta = ", ".join(".".join(key) for key in sorted(delta))
+            raise ValueError(f"`{cls.__name__}.root_grants` has permissions not present in the database: {delta}")
+
+    def get_agent(self) -> Agent | None:
+        """Return the agent granting :py:attr:`agent_grants`, when annotated by
+        :py:meth:`OwnedQuerySet.with_permissions`."""
+        if self.__dict__.get("agent_grants") is None:
+            return None
+        if (agent := self.__dict__.get("_agent")) is None:
+            agent = self._agent = Agent(user_id=self.agent_user_id, group_id=self.agent_group_id)
+        return agent
 
     def has_perm(self, user, perm: str) -> bool:
         """Return True if user has provided permission for object."""
+        if (agent := self.get_agent()) and agent.is_agent(user):
+            return perm in self.agent_grants
         if self.owner.is_agent(user):
             return perm in self.root_grants
         return self.access and self.access.has_perm(user, perm) or False
 
+    async def ahas_perm(self, user, perm: str) -> bool:
+        """Return True if user has provided permission for object (async)."""
+        if (agent := self.get_agent()) and await agent.ais_agent(user):
+            return perm in self.agent_grants
+        if await (await aget_related(self, "owner")).ais_agent(user):
+            return perm in self.root_grants
+        return self.access and await self.access.ahas_perm(user, perm) or False
+
     def get_all_permissions(self, user) -> set[str]:
         """Return allowed permissions for this user."""
+        if (agent := self.get_agent()) and agent.is_agent(user):
+            return set(self.agent_grants)
         if self.owner.is_agent(user):
             return self.root_grants
         return self.access and self.access.get_all_permissions(user) or set()
 
-    def share(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs) -> Access:
+    async def aget_all_permissions(self, user) -> set[str]:
+        """Return allowed permissions for this user (async)."""
+        if (agent := self.get_agent()) and await agent.ais_agent(user):
+            return set(self.agent_grants)
+        if await (await aget_related(self, "owner")).ais_agent(user):
+            return self.root_grants
+        return self.access and await self.access.aget_all_permissions(user) or set()
+
+    def share(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs) -> Access:
         """Share and save access to this object.
 
         See :py:meth:`get_share` for parameters.
@@ -179,19 +382,67 @@ class Owned(models.Model, metaclass=OwnedBase):
         obj.save()
         return obj
 
-    async def ashare(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs) -> Access:
+    async def ashare(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs) -> Access:
         """Share and save access to this object (async)."""
         obj = self.get_share(receiver, grants, **kwargs)
         await obj.asave()
         return obj
 
-    def get_share(self, receiver: Agent, grants: dict[str, int] | None = None, **kwargs) -> Access:
+    def share_many(
+        self, receivers: Iterable[Agent | UUID | str], grants: dict[str, int] | None = None, **kwargs
+    ) -> list[Access]:
+        """Share this object to many receivers at once, returning the saved accesses.
+
+        Grants are computed once, receivers' uuids are resolved in a single query and
+        accesses are saved with a single ``bulk_create``.
+
+        :param receivers: receivers as agents or uuids
+        :param grants: allowed permissions (should be in :py:attr:`root_grants`)
+        :param **kwargs: extra initial arguments
+        :yield Agent.DoesNotExist: when a receiver's uuid does not match any agent.
+        """
+        grants = self.get_share_grants(grants)
+        objs = [
+            self.Access(grants=dict(grants), **self.get_share_kwargs(receiver, kwargs))
+            for receiver in Agent.objects.get_many(receivers)
+        ]
+        return self.Access.objects.bulk_create(objs)
+
+    async def ashare_many(
+        self, receivers: Iterable[Agent | UUID | str], grants: dict[str, int] | None = None, **kwargs
+    ) -> list[Access]:
+        """Share this object to many receivers at once, returning the saved accesses (async).
+
+        See :py:meth:`share_many`.
+        """
+        grants = self.get_share_grants(grants)
+        objs = [
+            self.Access(grants=dict(grants), **self.get_share_kwargs(receiver, kwargs))
+            for receiver in await Agent.objects.aget_many(receivers)
+        ]
+        return await self.Access.objects.abulk_create(objs)
+
+    def get_share(self, receiver: Agent | int, grants: dict[str, int] | None = None, **kwargs) -> Access:
         """Share this object to this receiver, returning new unsaved :py:class:`~.access.Access`.
 
-        :param receiver: share's receiver
+        :param receiver: share's receiver or its id
         :param grants: allowed permissions (should be in :py:attr:`root_grants`)
         :param **kwargs: extra initial arguments
         """
+        grants = self.get_share_grants(grants)
+        return self.Access(grants=grants, **self.get_share_kwargs(receiver, kwargs))
+
+    def get_share_kwargs(self, receiver: Agent | int, kwargs) -> dict:
+        """Return initial arguments of an access shared from self, using ids of relations that are not loaded."""
+        e_key, emitter = get_lazy_relation(self, "owner", "emitter")
+        r_key = "receiver" if isinstance(receiver, Agent) else "receiver_id"
+        return {**kwargs, r_key: receiver, e_key: emitter, "target": self}
+
+    def get_share_grants(self, grants: dict[str, int] | None = None) -> dict[str, int]:
+        """Return grants of an access shared from self.
+
+        :yield PermissionDenied: when no grant is shareable.
+        """
         if grants:
             grants = {key: min(value, grants[key]) for key, value in self.root_grants.items() if key in grants}
         else:
@@ -199,7 +450,7 @@ class Owned(models.Model, metaclass=OwnedBase):
 
         if not grants:
             raise PermissionDenied("Share not allowed.")
-        return self.Access(target=self, emitter=self.owner, receiver=receiver, grants=grants, **kwargs)
+        return grants
 
     def get_absolute_url(self) -> str:
         if not self.detail_url_name:
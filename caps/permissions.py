@@ -38,10 +38,30 @@ class DjangoModelPermissions(permissions.DjangoModelPermissions):
         "GET": ["%(app_label)s.view_%(model_name)s"],
     }
 
+    required_permissions: dict[tuple, tuple[str, ...]] = {}
+    """Compiled required permissions, by ``(permission class, view class, action, method, model)``.
+
+    Permissions maps are expected not to change at runtime.
+    """
+
     def get_required_permissions(self, view, method, model_cls) -> list[str]:
         """
         Given a view, model and HTTP method, return the list of permission codes that the user is required to have.
 
+        Permissions are compiled once (see :py:meth:`compile_required_permissions`).
+        """
+        key = (type(self), type(view), getattr(view, "action", None), method, model_cls)
+        if (perms := self.required_permissions.get(key)) is None:
+            perms = self.required_permissions[key] = self.compile_required_permissions(view, method, model_cls)
+
+        if not perms:
+            raise exceptions.MethodNotAllowed(method)
+        return list(perms)
+
+    def compile_required_permissions(self, view, method, model_cls) -> tuple[str, ...]:
+        """
+        Return required permissions for the provided view, model and HTTP method.
+
         Lookup for them based on viewset action if any, then on method.
         Lookup for view's ``perms_map`` before self's one if any.
         """
@@ -53,14 +73,9 @@ class DjangoModelPermissions(permissions.DjangoModelPermissions):
         # action is selected before methods
         candidates = ((view_map, action), (self.perms_map, action), (view_map, method), (self.perms_map, method))
         for map, lookup in candidates:
-            if perms_ := (map and lookup and map.get(lookup)):
-                perms = perms_
-                break
-
-        if not perms:
-            raise exceptions.MethodNotAllowed(method)
-
-        return [perm % kwargs for perm in perms]
+            if perms := (map and lookup and map.get(lookup)):
+                return tuple(perm % kwargs for perm in perms)
+        return ()
 
     def has_permission(self, request, view):
         if not request.user or (not request.user.is_authenticated and self.authenticated_users_only):
@@ -145,9 +145,13 @@ class ShareSerializer(serializers.Serializer):
     """
     This serializer is used to deserialize requests to
     derive a Access (:py:meth:`~caps.views.api.AccessViewSet.share`).
+
+    Either a single ``receiver`` or a list of ``receivers`` must be provided. The
+    receivers are fetched in a single query.
     """
 
-    receiver = serializers.UUIDField()
+    receiver = serializers.UUIDField(required=False)
+    receivers = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
     expiration = serializers.DateTimeField(required=False)
     grants = serializers.DictField(child=serializers.IntegerField())
 
@@ -156,3 +160,14 @@ class ShareSerializer(serializers.Serializer):
             return models.Agent.objects.get(uuid=value)
         except ObjectDoesNotExist:
             raise ValidationError("Invalid receiver.")
+
+    def validate_receivers(self, value):
+        try:
+            return models.Agent.objects.get_many(value)
+        except ObjectDoesNotExist:
+            raise ValidationError("Invalid receivers.")
+
+    def validate(self, data):
+        if ("receiver" in data) == ("receivers" in data):
+            raise ValidationError("Provide either `receiver` or `receivers`.")
+        return data
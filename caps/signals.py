@@ -1,19 +1,112 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
 from django.contrib.auth.models import User, Group
 
-from .models import Agent
+from . import cache
+from .models import Agent, AgentMembership
+
+
+access_revoked = Signal()
+"""Sent once by :py:meth:`~.models.access.AccessQuerySet.revoke`, with arguments:
+
+- ``sender``: the concrete access model;
+- ``pks``: the ids of the revoked accesses (descendants excluded);
+- ``count``: the total count of deleted accesses (descendants included).
+"""
 
 
 @receiver(post_save, sender=User)
 def create_user_agent(sender, instance, created, *args, **kwargs):
-    """Ensure agent is created for each user being saved."""
-    if not hasattr(instance, "agent"):
+    """Ensure agent is created for each user being saved.
+
+    Users created in bulk don't trigger this signal: use ``caps_ensure_agents``
+    command or :py:meth:`~.models.agent.AgentQuerySet.ensure_for_users`.
+    """
+    if created or not hasattr(instance, "agent"):
         Agent.objects.create(user=instance)
 
 
 @receiver(post_save, sender=Group)
 def create_group_agent(sender, instance, created, *args, **kwargs):
     """Ensure agent is created for each group being saved."""
-    if not hasattr(instance, "agent"):
+    if created or not hasattr(instance, "agent"):
         Agent.objects.create(group=instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    """Invalidate users' cached groups when their membership changes."""
+    if action not in ("post_add", "post_remove", "pre_clear", "post_clear"):
+        return
+
+    if not reverse:
+        if action != "pre_clear":
+            cache.invalidate_user(instance)
+    elif action == "pre_clear":
+        cache.invalidate_users(instance.user_set.values_list("pk", flat=True))
+    elif pk_set:
+        cache.invalidate_users(pk_set)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, *args, **kwargs):
+    """Invalidate group's users cached groups."""
+    cache.invalidate_users(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def agent_changed(sender, instance, *args, created=True, **kwargs):
+    """Invalidate cached agents of users related to a created or deleted agent."""
+    if not created:
+        return
+    if instance.user_id:
+        cache.invalidate_users((instance.user_id,))
+    elif instance.group_id:
+        cache.invalidate_users(
+            User.groups.through.objects.filter(group_id=instance.group_id).values_list("user_id", flat=True)
+        )
+
+
+@receiver(user_logged_in)
+def warm_user_cache(sender, request, user, *args, **kwargs):
+    """Warm up user's cached groups and agents at login."""
+    if cache.get_cache() is not None:
+        cache.get_user_group_ids(user)
+        Agent.objects.resolve(user)
+
+
+@receiver(post_save, sender=Agent)
+def add_agent_memberships(sender, instance, created, *args, **kwargs):
+    """Create memberships of a newly created agent."""
+    if created and AgentMembership.is_enabled():
+        AgentMembership.objects.add_agents([instance])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def update_agent_memberships(sender, instance, action, reverse, pk_set, *args, **kwargs):
+    """Keep agents memberships in sync with users' groups."""
+    if action not in ("post_add", "post_remove", "pre_clear") or not AgentMembership.is_enabled():
+        return
+
+    objects = AgentMembership.objects
+    if not reverse:
+        group_agents = Agent.objects.filter(group__isnull=False)
+        if action == "pre_clear":
+            objects.filter(user=instance, agent__in=group_agents).delete()
+            return
+        agent_ids = group_agents.filter(group_id__in=pk_set).values_list("pk", flat=True)
+        user_ids = (instance.pk,)
+    else:
+        if not (agent_id := Agent.objects.filter(group=instance).values_list("pk", flat=True).first()):
+            return
+        if action == "pre_clear":
+            objects.filter(agent_id=agent_id).delete()
+            return
+        agent_ids, user_ids = (agent_id,), pk_set
+
+    if action == "post_add":
+        objects.add(user_ids, agent_ids)
+    else:
+        objects.remove(user_ids, agent_ids)
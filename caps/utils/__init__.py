@@ -1,6 +1,19 @@
 from typing import Any
 
 
+PATH_WIDTH = 10
+"""Width of ids in materialized paths of accesses (see :py:func:`get_path_segment`)."""
+
+
+def get_path_segment(pk: int) -> str:
+    """Return segment of a materialized path for the provided id.
+
+    Ids are zero padded to :py:data:`PATH_WIDTH`, so that paths sort depth first with
+    siblings in ids order, whatever the database collation is.
+    """
+    return f"{pk:0{PATH_WIDTH}d}/"
+
+
 def get_lazy_relation(obj, field, out_field: str | None = None) -> tuple[str, Any]:
     """
     For the provided model instance, return an attribute name and value for field.
@@ -35,3 +48,22 @@ def get_lazy_relation(obj, field, out_field: str | None = None) -> tuple[str, An
     if field in obj.__dict__:
         return out_field, getattr(obj, field)
     return f"{out_field}_id", getattr(obj, f"{field}_id", None)
+
+
+async def aget_related(obj, field: str):
+    """
+    Return related object of a foreign key, fetching it asynchronously if it has not been
+    fetched yet. The fetched object is then cached on ``obj`` as Django does for sync access.
+
+    :param obj: model instance
+    :param field: foreign key field name
+    :return the related object or None.
+    """
+    fk = obj._meta.get_field(field)
+    if fk.is_cached(obj):
+        return getattr(obj, field)
+    if (pk := getattr(obj, fk.attname)) is None:
+        return None
+    value = await fk.related_model._default_manager.aget(pk=pk)
+    fk.set_cached_value(obj, value)
+    return value
@@ -0,0 +1,49 @@
+"""
+Helpers to be used in migrations of applications providing concrete :py:class:`~caps.models.owned.Owned` models.
+"""
+
+from collections.abc import Callable
+
+from . import get_path_segment
+
+
+__all__ = ("backfill_access_tree",)
+
+
+def backfill_access_tree(model: str, batch_size: int = 1000) -> Callable:
+    """
+    Return a ``RunPython`` function that sets ``root``, ``depth`` and ``path``
+    of existing accesses, walking the chains level by level from the roots.
+
+    It is also used to convert paths of existing accesses to zero padded ids.
+
+    .. code-block:: python
+
+        operations = [
+            # ... fields creation
+            migrations.RunPython(backfill_access_tree("app.PostAccess"), migrations.RunPython.noop),
+        ]
+
+    :param model: the concrete access model as ``"app_label.ModelName"``
+    :param batch_size: bulk update batch size.
+    """
+
+    def forwards(apps, schema_editor):
+        Access = apps.get_model(model)
+        objects = Access.objects.using(schema_editor.connection.alias)
+
+        objects.filter(origin__isnull=True).update(root=None, depth=0, path="")
+        parents = {pk: (None, 0, "") for pk in objects.filter(origin__isnull=True).values_list("pk", flat=True)}
+        while parents:
+            ids, level = list(parents.keys()), {}
+            for i in range(0, len(ids), batch_size):
+                children = list(objects.filter(origin_id__in=ids[i : i + batch_size]).only("pk", "origin_id"))
+                for child in children:
+                    root_id, depth, path = parents[child.origin_id]
+                    child.root_id = root_id or child.origin_id
+                    child.depth, child.path = depth + 1, path + get_path_segment(child.origin_id)
+                    level[child.pk] = (child.root_id, child.depth, child.path)
+                objects.bulk_update(children, ["root", "depth", "path"], batch_size=batch_size)
+            parents = level
+
+    return forwards
@@ -31,6 +31,9 @@ class OwnedViewSet(UserAgentMixin, mixins.SingleOwnedMixin, viewsets.ModelViewSe
 
     It also provides the :py:meth:`share` that allows a user to share an access to
     the object.
+
+    Listed objects can be filtered on a permission granted to the user, using the
+    ``perm`` query parameter (see :py:meth:`get_perm`), as in ``?perm=change``.
     """
 
     perms_map = {
@@ -43,6 +46,8 @@ class OwnedViewSet(UserAgentMixin, mixins.SingleOwnedMixin, viewsets.ModelViewSe
     permission_classes = [permissions.OwnedPermissions]
     lookup_field = "uuid"
     lookup_url_kwarg = "uuid"
+    perm_query_param = "perm"
+    """Query parameter used to filter objects on a granted permission."""
 
     def get_access_queryset(self):
         # disable access fetch
@@ -51,9 +56,24 @@ class OwnedViewSet(UserAgentMixin, mixins.SingleOwnedMixin, viewsets.ModelViewSe
         return super().get_access_queryset()
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.action == "share":
-            return super().get_queryset().filter(owner__in=self.agents)
-        return super().get_queryset()
+            return queryset.filter(owner__in=self.agents)
+        if self.action == "list" and (perm := self.get_perm(queryset.model)):
+            return queryset.with_perm(perm, self.agents)
+        return queryset
+
+    def get_perm(self, model) -> str | None:
+        """Return permission to filter objects on, from :py:attr:`perm_query_param`.
+
+        It is either a full permission name (``"app_label.codename"``) or an action
+        (eg. ``"change"``) of the viewset's model.
+        """
+        if not (perm := self.request.query_params.get(self.perm_query_param)):
+            return None
+        if "." not in perm:
+            perm = f"{model._meta.app_label}.{perm}_{model._meta.model_name}"
+        return perm
 
     @action(detail=True, methods=["post"])
     def share(self, request, uuid=None):
@@ -69,16 +89,23 @@ class OwnedViewSet(UserAgentMixin, mixins.SingleOwnedMixin, viewsets.ModelViewSe
                 myapp.view_myobject: 1
                 myapp.change_myobject: 0
 
+        Object can be shared to many receivers at once by providing a list of agents
+        uuids as ``receivers`` instead of ``receiver``. The response is then a list of
+        accesses.
         """
         obj = self.get_object()
         ser = self.share_serializer_class(data=request.data)
         if not ser.is_valid():
             return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        access = obj.share(ser.validated_data["receiver"], ser.validated_data["grants"])
-
         # Get Access serializer from field `access`
         ser_cls = type(self.get_serializer_class()._declared_fields["access"])
+        data = ser.validated_data
+        if receivers := data.get("receivers"):
+            accesses = obj.share_many(receivers, data["grants"])
+            return Response(ser_cls(accesses, many=True).data, status=201)
+
+        access = obj.share(data["receiver"], data["grants"])
         return Response(ser_cls(access).data, status=201)
 
 
@@ -123,7 +150,13 @@ class AccessViewSet(
         ser = self.share_serializer_class(data=request.data)
         if not ser.is_valid():
             return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
-        shared = access.share(ser.validated_data["receiver"], ser.validated_data["grants"])
+
+        data = ser.validated_data
+        if receivers := data.get("receivers"):
+            shared = access.share_many(receivers, data["grants"])
+            return Response(self.get_serializer_class()(shared, many=True).data, status=201)
+
+        shared = access.share(data["receiver"], data["grants"])
         return Response(self.get_serializer_class()(shared).data, status=201)
 
 
@@ -6,7 +6,7 @@ from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.shortcuts import get_object_or_404
 
 from .. import permissions
-from ..models import Agent, AccessQuerySet
+from ..models import Agent, AgentSet, AccessQuerySet
 
 
 __all__ = (
@@ -22,20 +22,28 @@ __all__ = (
 class UserAgentMixin:
     """
     This mixin provides two cached properties providing user's agents.
+
+    They reuse request's ``agent`` and ``agents`` when provided by
+    :py:class:`~caps.middleware.AgentMiddleware`, so that agents are
+    fetched only once per request.
     """
 
     @cached_property
     def agent(self) -> Agent:
         """Return user's agent."""
-        return self.agents and self.agents[0]
+        if (agent := getattr(self.request, "agent", None)) is not None:
+            return agent
+        return self.agents.agent if isinstance(self.agents, AgentSet) else self.agents and self.agents[0]
 
     @cached_property
-    def agents(self) -> list[Agent]:
+    def agents(self) -> AgentSet:
         """
         Current user's agents (of his groups included).
         User's agent is the first of the list.
         """
-        return Agent.objects.user(self.request.user).order_by("-user")
+        if (agents := getattr(self.request, "agents", None)) is not None:
+            return agents
+        return AgentSet(self.request.user)
 
 
 class OwnedMixin(UserAgentMixin):
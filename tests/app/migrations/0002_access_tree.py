@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+from caps.utils.migrations import backfill_access_tree
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps_test", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="concreteownedaccess",
+            options={"verbose_name": "Access", "verbose_name_plural": "Accesses"},
+        ),
+        migrations.AddField(
+            model_name="concreteownedaccess",
+            name="depth",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Depth"),
+        ),
+        migrations.AddField(
+            model_name="concreteownedaccess",
+            name="path",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=512, verbose_name="Path"
+            ),
+        ),
+        migrations.AddField(
+            model_name="concreteownedaccess",
+            name="root",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="caps_test.concreteownedaccess",
+                verbose_name="Root",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="concreteowned",
+            name="uuid",
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, unique=True, verbose_name="Id"),
+        ),
+        migrations.RunPython(backfill_access_tree("caps_test.ConcreteOwnedAccess"), migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps_test", "0002_access_tree"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="concreteownedaccess",
+            name="expiration",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Defines an expiration date after which the access is not longer valid.",
+                null=True,
+                verbose_name="Expiration",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps", "0003_agentmembership"),
+        ("caps_test", "0003_access_expiration_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="concreteownedaccess",
+            index=models.Index(fields=["receiver", "expiration"], name="caps_dbad4338_rcv_exp"),
+        ),
+        migrations.AddIndex(
+            model_name="concreteownedaccess",
+            index=models.Index(
+                condition=models.Q(("expiration__isnull", True)), fields=["receiver"], name="caps_dbad4338_rcv_noexp"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="concreteownedaccess",
+            index=models.Index(fields=["target", "receiver"], name="caps_dbad4338_tgt_rcv"),
+        ),
+        migrations.AddIndex(
+            model_name="concreteownedaccess",
+            index=models.Index(fields=["uuid", "receiver"], name="caps_dbad4338_uuid_rcv"),
+        ),
+    ]
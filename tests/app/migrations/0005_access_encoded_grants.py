@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps_test", "0004_access_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="concreteownedaccess",
+            name="perms",
+            field=models.BigIntegerField(default=0, editable=False, verbose_name="Permissions mask"),
+        ),
+        migrations.AddField(
+            model_name="concreteownedaccess",
+            name="reshares",
+            field=models.BinaryField(default=b"", verbose_name="Reshares"),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps_test", "0005_access_encoded_grants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConcreteOwnedAccessGrant",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("permission", models.CharField(max_length=255, verbose_name="Permission")),
+                ("reshare", models.PositiveSmallIntegerField(default=0, verbose_name="Reshare")),
+                (
+                    "access",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access_grants",
+                        to="caps_test.concreteownedaccess",
+                        verbose_name="Access",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Access grant",
+                "verbose_name_plural": "Access grants",
+                "abstract": False,
+                "proxy": False,
+                "indexes": [models.Index(fields=["permission", "access"], name="caps_f4e7086a_perm_acc")],
+                "unique_together": {("access", "permission")},
+            },
+        ),
+    ]
@@ -0,0 +1,13 @@
+from django.db import migrations
+
+from caps.utils.migrations import backfill_access_tree
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps_test", "0006_access_grant"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_access_tree("caps_test.ConcreteOwnedAccess"), migrations.RunPython.noop),
+    ]
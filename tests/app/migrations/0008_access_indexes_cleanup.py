@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:53
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps", "0004_permissionbit"),
+        ("caps_test", "0007_access_path_padding"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="concreteownedaccess",
+            name="caps_dbad4338_rcv_noexp",
+        ),
+        migrations.AlterField(
+            model_name="concreteownedaccess",
+            name="receiver",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="caps.agent",
+                verbose_name="Receiver",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="concreteownedaccess",
+            name="target",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="accesses",
+                to="caps_test.concreteowned",
+                verbose_name="Target",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="concreteownedaccess",
+            name="uuid",
+            field=models.UUIDField(default=uuid.uuid4, verbose_name="Id"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("caps", "0004_permissionbit"),
+        ("caps_test", "0008_access_indexes_cleanup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="concreteownedaccess",
+            index=models.Index(
+                condition=models.Q(("expiration__isnull", True)), fields=["receiver"], name="caps_dbad4338_rcv_noexp"
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+"""
+Benchmarks comparing implementation strategies.
+
+They are skipped unless the ``CAPS_BENCHMARK`` environment variable is set, and print
+their results (run pytest with ``-s`` to see them):
+
+.. code-block:: bash
+
+    CAPS_BENCHMARK=1 pytest -s tests/benchmarks
+
+Run them against PostgreSQL by providing a ``DATABASES`` setting using it.
+"""
+
+import os
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+__all__ = ("benchmark", "measure", "report")
+
+
+benchmark = [
+    pytest.mark.skipif(not os.environ.get("CAPS_BENCHMARK"), reason="CAPS_BENCHMARK is not set"),
+    pytest.mark.django_db(transaction=True),
+]
+"""Marks to apply to benchmark modules (as ``pytestmark``)."""
+
+
+def measure(func, *args, **kwargs) -> tuple[float, int, object]:
+    """Run function, returning elapsed time in seconds, executed queries count and result."""
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return elapsed, len(ctx.captured_queries), result
+
+
+def report(title: str, rows: list[tuple]):
+    """Print results as ``(label, size, seconds, queries)`` rows."""
+    print(f"\n{title} [{connection.vendor}]")
+    print(f"    {'strategy':<24} {'size':>8} {'time (ms)':>12} {'queries':>8}")
+    for label, size, elapsed, queries in rows:
+        print(f"    {label:<24} {size:>8} {elapsed * 1000:>12.2f} {queries:>8}")
@@ -0,0 +1,33 @@
+import pytest
+
+from caps.models import Agent
+from tests.app.models import Access, ConcreteOwned
+from . import benchmark, measure, report
+
+
+pytestmark = benchmark
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_access_join(count):
+    # a user's agent and its group's agent, both receiving an access to every object
+    owner, receiver, group = Agent.objects.bulk_create([Agent(), Agent(), Agent()])
+    objs = ConcreteOwned.objects.bulk_create([ConcreteOwned(name=f"bench-{i}", owner=owner) for i in range(count)])
+    Access.objects.bulk_create(
+        [
+            Access(target=obj, emitter=owner, receiver=agent, grants={"caps_test.view_concreteowned": 1})
+            for obj in objs
+            for agent in (receiver, group)
+        ]
+    )
+    agents = [receiver.pk, group.pk]
+
+    rows, results = [], {}
+    for join in (False, True):
+        queryset = ConcreteOwned.objects.available(agents, Access.objects.all(), join=join)
+        elapsed, queries, result = measure(lambda: [obj.pk for obj in queryset if obj.access])
+        results[join] = result
+        rows.append(("join" if join else "subquery + prefetch", count, elapsed, queries))
+
+    assert sorted(results[False]) == sorted(results[True]) == sorted(obj.pk for obj in objs)
+    report("OwnedQuerySet.available() access modes, two agents", rows)
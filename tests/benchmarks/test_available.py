@@ -0,0 +1,41 @@
+import pytest
+
+from caps.models import Agent, OwnedQuerySet
+from tests.app.models import Access, ConcreteOwned
+from . import benchmark, measure, report
+
+
+pytestmark = benchmark
+
+
+def create_objects(agents, count):
+    """Create objects owned by agents, each one shared to the two next agents."""
+    objs = ConcreteOwned.objects.bulk_create(
+        [ConcreteOwned(name=f"bench-{i}", owner=agents[i % len(agents)]) for i in range(count)]
+    )
+    grants = {"caps_test.view_concreteowned": 1}
+    Access.objects.bulk_create(
+        [
+            Access(target=obj, emitter=obj.owner, receiver=agents[(i + j) % len(agents)], grants=grants)
+            for i, obj in enumerate(objs)
+            for j in (1, 2)
+        ]
+    )
+
+
+@pytest.mark.parametrize("count", [1000, 10000, 50000])
+def test_available_strategies(count):
+    agents = Agent.objects.bulk_create([Agent() for _ in range(20)])
+    create_objects(agents, count)
+    selected = agents[:3]
+
+    rows, results = [], {}
+    for strategy in OwnedQuerySet.strategies:
+        queryset = ConcreteOwned.objects.available(selected, Access.objects.all(), strategy)
+        elapsed, queries, result = measure(lambda: list(queryset.values_list("pk", flat=True)))
+        results[strategy] = result
+        rows.append((strategy, count, elapsed, queries))
+
+    assert len(results["exists"]) == len(set(results["exists"]))
+    assert set(results["exists"]) == set(results["union"]) == set(results["or"])
+    report("OwnedQuerySet.available() strategies", rows)
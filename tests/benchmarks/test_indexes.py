@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone as tz
+
+from caps.models import Agent
+from tests.app.models import Access, ConcreteOwned
+from . import benchmark, measure, report
+
+
+pytestmark = benchmark
+
+
+def create_accesses(owner, receivers, count):
+    """Create objects shared to receivers, half of the accesses expiring."""
+    objs = ConcreteOwned.objects.bulk_create(
+        [ConcreteOwned(name=f"bench-{i}", owner=owner) for i in range(count // len(receivers))]
+    )
+    expiration = tz.now() + timedelta(days=1)
+    Access.objects.bulk_create(
+        [
+            Access(
+                target=obj,
+                emitter=owner,
+                receiver=receiver,
+                expiration=(i % 2 and expiration) or None,
+                grants={"caps_test.view_concreteowned": 1},
+            )
+            for obj in objs
+            for i, receiver in enumerate(receivers)
+        ]
+    )
+    return objs
+
+
+def get_queries(agents, obj, access):
+    """Return query shapes run on accesses as ``(label, queryset)``."""
+    return [
+        ("available", Access.objects.receiver(agents).available()),
+        ("target+receiver", Access.objects.filter(target=obj, receiver__in=agents)),
+        ("uuid+receiver", Access.objects.filter(uuid=access.uuid, receiver__in=agents)),
+    ]
+
+
+@pytest.mark.parametrize("count", [10000, 50000])
+def test_access_indexes(user_agent, count):
+    receivers = Agent.objects.bulk_create([Agent() for _ in range(50)])
+    objs = create_accesses(user_agent, receivers, count)
+    agents = receivers[:3]
+    obj = objs[len(objs) // 2]
+    access = Access.objects.filter(target=obj, receiver=agents[0]).first()
+
+    rows, plans = [], []
+    for indexed in (False, True):
+        if not indexed:
+            with connection.schema_editor() as editor:
+                for index in Access._meta.indexes:
+                    editor.remove_index(Access, index)
+        for label, queryset in get_queries(agents, obj, access):
+            queryset = queryset.values_list("pk", flat=True)
+            elapsed, queries, result = measure(lambda: list(queryset))
+            label = f"{label} ({'indexed' if indexed else 'no index'})"
+            rows.append((label, count, elapsed, queries))
+            plans.append((label, queryset.explain()))
+        if not indexed:
+            with connection.schema_editor() as editor:
+                for index in Access._meta.indexes:
+                    editor.add_index(Access, index)
+
+    report("Access query shapes", rows)
+    for label, plan in plans:
+        print(f"\n    {label}:\n        " + plan.replace("\n", "\n        "))
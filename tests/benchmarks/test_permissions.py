@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from caps.permissions import OwnedPermissions
+from tests.app.models import ConcreteOwned
+from . import benchmark, measure, report
+
+
+pytestmark = benchmark
+
+
+class View:
+    queryset = ConcreteOwned.objects.all()
+    action = "retrieve"
+
+
+def test_permissions_throughput(user, object, access):
+    perms, view, count = OwnedPermissions(), View(), 10000
+    request = SimpleNamespace(user=user, method="GET")
+    perms.has_object_permission(request, view, object)
+
+    def uncompiled():
+        for _ in range(count):
+            perms.compile_required_permissions(view, "GET", ConcreteOwned)
+
+    def compiled():
+        for _ in range(count):
+            perms.get_required_permissions(view, "GET", ConcreteOwned)
+
+    def has_object_permission():
+        for _ in range(count):
+            perms.has_object_permission(request, view, object)
+
+    rows = []
+    for label, func in (
+        ("uncompiled perms", uncompiled),
+        ("compiled perms", compiled),
+        ("has_object_permission", has_object_permission),
+    ):
+        elapsed, queries, _ = measure(func)
+        rows.append((label, count, elapsed, queries))
+    report("DjangoModelPermissions throughput", rows)
@@ -0,0 +1,39 @@
+import pytest
+
+from caps.models import Agent
+from tests.app.models import Access, ConcreteOwned
+from . import benchmark, measure, report
+
+
+pytestmark = benchmark
+
+
+def create_tree(owner, receivers, depth):
+    """Create object and a tree of accesses, returning the root access."""
+    obj = ConcreteOwned.objects.create(name="bench", owner=owner)
+    root = obj.share(receivers[0])
+    level = [root]
+    for _ in range(depth):
+        objs = [parent.get_share(receiver) for parent in level for receiver in receivers]
+        level = Access.objects.bulk_create(objs)
+    return root
+
+
+@pytest.mark.parametrize("depth,fanout", [(3, 5), (4, 6), (5, 6)])
+def test_revoke_vs_cascade(monkeypatch, user_agent, depth, fanout):
+    monkeypatch.setattr(ConcreteOwned, "root_grants", {"caps_test.view_concreteowned": depth + 1})
+    receivers = Agent.objects.bulk_create([Agent() for _ in range(fanout)])
+
+    root = create_tree(user_agent, receivers, depth)
+    size = Access.objects.subtree(root).count()
+    cascade = measure(root.delete)
+
+    root = create_tree(user_agent, receivers, depth)
+    revoke = measure(root.revoke)
+
+    assert revoke[2] == size
+    assert not Access.objects.exists()
+    report(
+        f"Revoke subtree (depth={depth}, fanout={fanout})",
+        [("cascade", size, *cascade[:2]), ("revoke", size, *revoke[:2])],
+    )
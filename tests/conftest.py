@@ -1,16 +1,19 @@
 import pytest
 import unittest
+from contextlib import contextmanager
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group, User, Permission
+from django.db import connection
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIRequestFactory, force_authenticate
 
-from caps.models import Agent
+from caps.models import Agent, registry
 from .app.models import ConcreteOwned
 
 
-__all__ = ("assertCountEqual",)
+__all__ = ("assertCountEqual", "capture_statements")
 
 
 test_case = unittest.TestCase()
@@ -21,6 +24,16 @@ req_factory = RequestFactory()
 api_req_factory = APIRequestFactory()
 
 
+@contextmanager
+def capture_statements():
+    """Capture executed SQL statements, excluding transaction management ones."""
+    statements = []
+    with CaptureQueriesContext(connection) as ctx:
+        yield statements
+    skip = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+    statements.extend(q["sql"] for q in ctx.captured_queries if not q["sql"].startswith(skip))
+
+
 def init_request(req, user):
     """Initialize request."""
     setattr(req, "user", user)
@@ -129,6 +142,21 @@ def agents(db, user_2_agents, group):
 
 
 # -- Capabilities
+@pytest.fixture
+def access_grants(settings):
+    """Enable access grants rows."""
+    settings.CAPS_ACCESS_GRANTS = True
+
+
+@pytest.fixture
+def grants_encoding(settings):
+    """Enable grants encoding, with a registry matching the (flushed) database."""
+    settings.CAPS_GRANTS_ENCODING = True
+    registry.clear()
+    yield registry
+    registry.clear()
+
+
 @pytest.fixture
 def permissions(db):
     perms = Permission.objects.all().values_list("content_type__app_label", "codename")[0:3]
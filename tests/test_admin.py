@@ -0,0 +1,60 @@
+import pytest
+
+from django.contrib.auth.models import Group, User
+from django.urls import reverse
+
+from caps.admin import EstimatedCountPaginator
+from caps.models import Agent
+from .app.models import Access, ConcreteOwned
+from .conftest import capture_statements
+
+
+@pytest.fixture
+def admin_client(client, db):
+    user = User.objects.create_superuser(username="admin-1", password="none")
+    client.force_login(user)
+    return client
+
+
+def create_accesses(owner, count, prefix):
+    receivers = [User.objects.create_user(username=f"{prefix}-{i}").agent for i in range(count)]
+    obj = ConcreteOwned.objects.create(name="object", owner=owner)
+    root = obj.share(receivers[0])
+    for receiver in receivers[1:]:
+        root.share(receiver)
+
+
+def count_changelist_queries(client, url):
+    with capture_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def count_filter_choices(client, url):
+    changelist = client.get(url).context["cl"]
+    return sum(len(list(spec.choices(changelist))) for spec in changelist.filter_specs)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAdmin:
+    def test_access_changelist_queries(self, admin_client, user_agent):
+        url = reverse("admin:caps_test_concreteownedaccess_changelist")
+        create_accesses(user_agent, 2, "a")
+        count = count_changelist_queries(admin_client, url)
+        create_accesses(user_agent, 8, "b")
+        assert count_changelist_queries(admin_client, url) == count
+
+    def test_agent_changelist_queries(self, admin_client, user_agent):
+        url = reverse("admin:caps_agent_changelist")
+        Agent.objects.bulk_create([Agent() for _ in range(2)])
+        count = count_changelist_queries(admin_client, url)
+        choices = count_filter_choices(admin_client, url)
+        for i in range(8):
+            User.objects.create_user(username=f"user-{i}")
+            Group.objects.create(name=f"admin-group-{i}")
+        assert count_changelist_queries(admin_client, url) == count
+        assert count_filter_choices(admin_client, url) == choices
+
+    def test_estimated_count_paginator(self, access):
+        assert EstimatedCountPaginator(Access.objects.order_by("pk"), 10).count == 1
@@ -1,6 +1,7 @@
 import pytest
 
-from caps import backends
+from caps import backends, cache
+from .app.models import ConcreteOwned
 
 
 @pytest.fixture
@@ -26,6 +27,31 @@ class TestCapsBackend:
         perm = next(iter(object.root_grants.keys()))
         assert not perm_backend.has_perm(user_2, perm, object)
 
+    def test_has_perm_with_permissions(
+        self, perm_backend, user_2, user_2_agent, object, access, django_assert_num_queries
+    ):
+        obj = ConcreteOwned.objects.with_permissions([user_2_agent]).get(pk=object.pk)
+        perm = next(iter(access.grants))
+        with django_assert_num_queries(0):
+            assert perm_backend.has_perm(user_2, perm, obj)
+            assert perm_backend.get_all_permissions(user_2, obj) == set(access.grants)
+
+    def test_has_perm_memoized(self, perm_backend, user, user_2, object, access, django_assert_num_queries):
+        perm = next(iter(object.root_grants.keys()))
+        object = ConcreteOwned.objects.get(pk=object.pk)
+        assert perm_backend.has_perm(user, perm, object)
+        with django_assert_num_queries(0):
+            assert perm_backend.has_perm(user, perm, object)
+
+        # access is part of the key
+        object.access = access
+        assert perm_backend.has_perm(user_2, perm, object)
+        assert not perm_backend.has_perm(user_2, "invalid.perm", object)
+        assert ("caps_test.ConcreteOwned", object.pk, access.pk, perm) in perm_backend.get_perms_cache(user_2)
+
+        cache.invalidate_user(user_2)
+        assert not perm_backend.get_perms_cache(user_2)
+
     def test_get_all_permissions(self, perm_backend, user, user_2, object, access, orphan_perm):
         assert perm_backend.get_all_permissions(user, object)
         assert not perm_backend.get_all_permissions(user_2, object)
@@ -35,3 +61,18 @@ class TestCapsBackend:
         assert perm_backend.get_all_permissions(user_2, object) == set(access.grants.keys())
         assert perm_backend.get_all_permissions(user_2, access) == set(access.grants.keys())
         assert not perm_backend.get_all_permissions(user_2, orphan_perm)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCapsBackendAsync:
+    @pytest.mark.asyncio
+    async def test_ahas_perm(self, perm_backend, user, user_2, object, access):
+        perm = next(iter(object.root_grants.keys()))
+        assert await perm_backend.ahas_perm(user, perm, object)
+        assert not await perm_backend.ahas_perm(user, perm)
+        assert await perm_backend.ahas_perm(user_2, perm, access)
+
+    @pytest.mark.asyncio
+    async def test_aget_all_permissions(self, perm_backend, user_2, access):
+        assert await perm_backend.aget_all_permissions(user_2, access) == set(access.grants.keys())
+        assert await perm_backend.aget_all_permissions(user_2) == set()
@@ -0,0 +1,126 @@
+import pytest
+
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.signals import user_logged_in
+
+from caps import cache
+from caps.models import Agent, AgentSet
+
+
+@pytest.fixture
+def caps_cache(settings):
+    settings.CAPS_CACHE = "default"
+    yield cache.get_cache()
+    cache.get_cache().clear()
+
+
+def get_cached(caps_cache, name, user):
+    return caps_cache.get(cache.get_key(name, user.pk, cache.get_version(caps_cache, user.pk)))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUserGroupIds:
+    def test_get_user_group_ids(self, user, groups, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert cache.get_user_group_ids(user) == {groups[0].pk}
+            assert cache.get_user_group_ids(user) == {groups[0].pk}
+
+    def test_get_user_group_ids_from_cache(self, caps_cache, user, groups, django_assert_num_queries):
+        cache.get_user_group_ids(user)
+        user = User.objects.get(pk=user.pk)
+        with django_assert_num_queries(0):
+            assert cache.get_user_group_ids(user) == {groups[0].pk}
+
+    def test_invalidate_on_group_add(self, caps_cache, user, groups):
+        assert cache.get_user_group_ids(user) == {groups[0].pk}
+        user.groups.add(groups[1])
+        assert cache.get_user_group_ids(user) == {g.pk for g in groups}
+        assert get_cached(caps_cache, "groups", user) == {g.pk for g in groups}
+
+    def test_invalidate_on_group_remove_reverse(self, caps_cache, user, user_2, user_group):
+        cache.get_user_group_ids(user)
+        cache.get_user_group_ids(user_2)
+        user_group.user_set.remove(user)
+        assert get_cached(caps_cache, "groups", user) is None
+        assert get_cached(caps_cache, "groups", user_2) is not None
+
+    def test_invalidate_on_group_clear_reverse(self, caps_cache, user, user_group):
+        cache.get_user_group_ids(user)
+        user_group.user_set.clear()
+        assert get_cached(caps_cache, "groups", user) is None
+
+    def test_invalidate_on_group_delete(self, caps_cache, user, user_group):
+        cache.get_user_group_ids(user)
+        user_group.delete()
+        assert get_cached(caps_cache, "groups", user) is None
+
+    def test_is_agent_cached(self, user, group_agent, user_agent, django_assert_num_queries):
+        group_agent.is_agent(user)
+        with django_assert_num_queries(0):
+            assert group_agent.is_agent(user)
+            assert user_agent.is_agent(user)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestVersion:
+    def test_invalidate_users_bump_version(self, caps_cache, user):
+        version = cache.get_version(caps_cache, user.pk)
+        cache.invalidate_users([user.pk])
+        assert cache.get_version(caps_cache, user.pk) == version + 1
+
+    def test_invalidate_users_missing_version(self, caps_cache, user):
+        cache.invalidate_users([user.pk])
+        assert cache.get_version(caps_cache, user.pk)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUserAgents:
+    def test_resolve(self, caps_cache, user, user_agent, group_agent):
+        expected = [(user_agent.pk, user_agent.uuid, None), (group_agent.pk, group_agent.uuid, group_agent.group_id)]
+        assert sorted(Agent.objects.resolve(user)) == sorted(expected)
+        assert sorted(get_cached(caps_cache, "agents", user)) == sorted(expected)
+
+    def test_user_uses_resolved(self, caps_cache, user, user_agents, django_assert_num_queries):
+        Agent.objects.resolve(User.objects.get(pk=user.pk))
+        user = User.objects.get(pk=user.pk)
+        with django_assert_num_queries(1):
+            assert set(Agent.objects.user(user)) == set(user_agents)
+
+    def test_agent_set_from_cache(self, caps_cache, user, user_agent, user_agents, django_assert_num_queries):
+        Agent.objects.resolve(User.objects.get(pk=user.pk))
+        user = User.objects.get(pk=user.pk)
+        with django_assert_num_queries(0):
+            agents = AgentSet(user)
+            assert agents.agent == user_agent
+            assert agents.agent.uuid == user_agent.uuid
+            assert set(agents) == set(user_agents)
+
+    @pytest.mark.asyncio
+    async def test_aresolve_shared_with_resolve(self, caps_cache, user, user_agent, user_agents):
+        resolved = await Agent.objects.aresolve(user)
+        assert get_cached(caps_cache, "agents", user) == resolved
+        agents = await AgentSet(await User.objects.aget(pk=user.pk)).aload()
+        assert agents.agent == user_agent
+
+    def test_invalidate_on_groups_changed(self, caps_cache, user, user_agents):
+        group = Group.objects.create(name="group-3")
+        Agent.objects.resolve(user)
+        user.groups.add(group)
+        assert get_cached(caps_cache, "agents", user) is None
+        assert len(Agent.objects.resolve(user)) == 3
+
+    def test_invalidate_on_group_agent_created(self, caps_cache, user, user_group, user_agents):
+        user_group.agent.delete()
+        Agent.objects.resolve(User.objects.get(pk=user.pk))
+        Agent.objects.create(group=user_group)
+        assert get_cached(caps_cache, "agents", user) is None
+
+    def test_invalidate_on_agent_deleted(self, caps_cache, user, group_agent, user_agents):
+        Agent.objects.resolve(user)
+        group_agent.delete()
+        assert get_cached(caps_cache, "agents", user) is None
+
+    def test_warm_on_login(self, caps_cache, user, user_agents):
+        user_logged_in.send(sender=User, request=None, user=user)
+        assert get_cached(caps_cache, "agents", user)
+        assert get_cached(caps_cache, "groups", user)
@@ -1,7 +1,7 @@
 import pytest
 
 from django.contrib.auth.models import AnonymousUser
-from caps.models import Agent
+from caps.models import Agent, AgentSet
 from caps.middleware import AgentMiddleware
 from .conftest import req_factory, assertCountEqual
 
@@ -11,6 +11,14 @@ def middleware():
     return AgentMiddleware(lambda r: None)
 
 
+@pytest.fixture
+def async_middleware():
+    async def get_response(request):
+        return request
+
+    return AgentMiddleware(get_response)
+
+
 @pytest.fixture
 def req(user):
     req = req_factory.get("/")
@@ -24,8 +32,26 @@ class TestAgentMiddleware:
         assert req.agent == user_agent
         assertCountEqual(req.agents, user_agents)
 
+    def test__call__lazy(self, middleware, req, user_agents, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            middleware(req)
+        with django_assert_num_queries(1):
+            assert req.agent == req.agents[0]
+            assert req.agent in req.agents
+
+    def test__call__anonymous_without_agent(self, middleware, req):
+        req.user = AnonymousUser()
+        middleware(req)
+        assert req.agent is None
+
+    def test__call__anonymous(self, middleware, req, anon_agent):
+        req.user = AnonymousUser()
+        middleware(req)
+        assert type(req.agent) is Agent and req.agent == anon_agent
+
     def test_get_agents(self, middleware, req, user_agents):
         agents = middleware.get_agents(req)
+        assert isinstance(agents, AgentSet)
         assert agents[0].user_id == req.user.id
         assertCountEqual(agents, user_agents)
 
@@ -41,3 +67,34 @@ class TestAgentMiddleware:
         agent = middleware.get_agent(req, [])
         assert agent.user == req.user
         assert req.user.agent == agent
+
+    def test_get_agent_create_new_one_added_to_agents(self, middleware, req):
+        Agent.objects.filter(user=req.user).delete()
+        req.user.refresh_from_db()
+        agents = AgentSet(req.user)
+        agent = middleware.get_agent(req, agents)
+        assert agents[0] == agent
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAgentMiddlewareAsync:
+    @pytest.mark.asyncio
+    async def test__acall__(self, async_middleware, req, user_agent, user_agents):
+        await async_middleware(req)
+        assert req.agents.is_loaded
+        assert req.agent == user_agent
+        assertCountEqual(req.agents, user_agents)
+
+    @pytest.mark.asyncio
+    async def test_aget_agent_with_anonymous_user(self, async_middleware, req, anon_agent):
+        req.user = AnonymousUser()
+        agents = await async_middleware.aget_agents(req)
+        assert await async_middleware.aget_agent(req, agents) == anon_agent
+
+    @pytest.mark.asyncio
+    async def test_aget_agent_create_new_one(self, async_middleware, req, user_agent):
+        await user_agent.adelete()
+        agents = await AgentSet(req.user).aload()
+        agent = await async_middleware.aget_agent(req, agents)
+        assert agent.user_id == req.user.pk
+        assert agents[0] == agent
@@ -1,11 +1,23 @@
+import json
 from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db import connection
 
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone as tz
 import pytest
 
-from .app.models import Access
-from .conftest import assertCountEqual
+from caps.models import Agent, AgentSet, PermissionBit, registry
+from caps.signals import access_revoked
+from caps.utils import get_path_segment
+from caps.utils.migrations import backfill_access_tree
+from .app.models import Access, ConcreteOwned
+from .conftest import assertCountEqual, capture_statements
 
 
 @pytest.mark.django_db(transaction=True)
@@ -22,6 +34,315 @@ class TestAccessQuerySet:
         access.save(update_fields=["expiration"])
         assert not Access.objects.available(user_2_agent).exists()
 
+    def test_subtree(self, access, user_agent, group_agent, user_2_agent):
+        child = access.share(group_agent)
+        grandchild = child.share(user_agent)
+        other = access.target.share(user_2_agent)
+
+        assertCountEqual(Access.objects.subtree(access), [access, child, grandchild])
+        assertCountEqual(Access.objects.subtree(access, include_self=False), [child, grandchild])
+        assertCountEqual(Access.objects.subtree(child), [child, grandchild])
+        assert other not in Access.objects.subtree(access)
+
+    def test_descendants_of(self, access, user_agent, group_agent, user_2_agent):
+        child = access.share(group_agent)
+        grandchild = child.share(user_agent)
+        child_2 = access.share(user_agent)
+        query = Access.objects.descendants_of(access)
+        assert [(a, a.distance) for a in query] == [(child, 1), (grandchild, 2), (child_2, 1)]
+        assert [(a, a.distance) for a in Access.objects.descendants_of(child)] == [(grandchild, 1)]
+
+    def test_ancestors_of(self, access, user_agent, group_agent):
+        child = access.share(group_agent)
+        grandchild = child.share(user_agent)
+        query = Access.objects.ancestors_of(grandchild)
+        assert [(a, a.distance) for a in query] == [(access, 2), (child, 1)]
+        assert not Access.objects.ancestors_of(access).exists()
+
+    def test_tree(self, access, user_agent, group_agent, user_2_agent):
+        child = access.share(group_agent)
+        other = access.target.share(group_agent)
+        grandchild = child.share(user_agent)
+        other_child = other.share(user_2_agent)
+        expected = [access, child, grandchild, other, other_child]
+        assert list(Access.objects.tree(access.target)) == expected
+
+    def test_tree_order_numeric(self, access):
+        agents = Agent.objects.bulk_create([Agent() for _ in range(12)])
+        children = [access.share(agent) for agent in agents[:11]]
+        grandchild = children[0].share(agents[11])
+        assert max(a.pk for a in children) > 9
+        expected = [access, children[0], grandchild] + children[1:]
+        assert list(Access.objects.tree(access.target)) == expected
+
+    def test_revoke(self, access, user_agent, group_agent, user_2_agent):
+        child = access.share(group_agent)
+        child.share(user_agent)
+        other = access.target.share(group_agent)
+        calls = []
+
+        def receiver(sender, **kwargs):
+            calls.append((sender, sorted(kwargs["pks"]), kwargs["count"]))
+
+        access_revoked.connect(receiver)
+        try:
+            assert Access.objects.filter(pk__in=[child.pk, other.pk]).revoke() == 3
+        finally:
+            access_revoked.disconnect(receiver)
+
+        assert list(Access.objects.all()) == [access]
+        assert calls == [(Access, sorted([child.pk, other.pk]), 3)]
+
+    def test_revoke_empty(self, access):
+        assert Access.objects.none().revoke() == 0
+
+    def test_sweep_expired(self, access, group_agent, user_agent):
+        child = access.share(group_agent)
+        child.share(user_agent)
+        other = access.share(user_agent)
+        Access.objects.filter(pk=child.pk).update(expiration=tz.now() - timedelta(hours=1))
+
+        calls = []
+
+        def receiver(sender, **kwargs):
+            calls.append((kwargs["pks"], kwargs["count"]))
+
+        access_revoked.connect(receiver)
+        try:
+            assert Access.objects.sweep_expired(chunk_size=1) == (1, 1)
+        finally:
+            access_revoked.disconnect(receiver)
+        assertCountEqual(Access.objects.values_list("pk", flat=True), [access.pk, other.pk])
+        assert calls == [([child.pk], 2)]
+
+    def test_sweep_expired_dry_run(self, access, group_agent, user_agent):
+        child = access.share(group_agent)
+        child.share(user_agent)
+        Access.objects.filter(origin__isnull=False).update(expiration=tz.now() - timedelta(hours=1))
+        assert Access.objects.sweep_expired(chunk_size=1, dry_run=True) == (1, 1)
+        assert Access.objects.count() == 3
+
+    def test_caps_sweep_expired_command(self, access, group_agent):
+        child = access.share(group_agent)
+        Access.objects.filter(pk=child.pk).update(expiration=tz.now() - timedelta(hours=1))
+        out = StringIO()
+        call_command("caps_sweep_expired", "caps_test.ConcreteOwnedAccess", stdout=out)
+        assert "Deleted 1 expired and 0 cascaded access(es)." in out.getvalue()
+        assert not Access.objects.filter(pk=child.pk).exists()
+
+    def test_caps_sweep_expired_command_unknown_model(self):
+        with pytest.raises(CommandError):
+            call_command("caps_sweep_expired", "caps_test.Unknown")
+
+    def test_caps_export_import(self, tmp_path, access, group_agent, user_agent):
+        child = access.share(group_agent, expiration=tz.now() + timedelta(days=1))
+        grandchild = child.share(user_agent)
+        path = tmp_path / "accesses.jsonl"
+        call_command("caps_export", output=str(path), stderr=StringIO())
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)["uuid"] for line in lines] == [str(a.uuid) for a in (access, child, grandchild)]
+
+        expected = list(Access.objects.tree_order().values_list("uuid", "emitter", "receiver", "expiration", "grants"))
+        Access.objects.all().delete()
+        out = StringIO()
+        call_command("caps_import", str(path), batch_size=2, stdout=out)
+        assert "imported 3 access(es)" in out.getvalue()
+        values = Access.objects.tree_order().values_list("uuid", "emitter", "receiver", "expiration", "grants")
+        assert list(values) == expected
+        pks = Access.objects.filter(uuid__in=[access.uuid, child.uuid]).order_by("depth").values_list("pk", flat=True)
+        assert Access.objects.get(uuid=grandchild.uuid).path == "".join(get_path_segment(pk) for pk in pks)
+
+        call_command("caps_import", str(path), stdout=out)
+        assert Access.objects.count() == 3
+
+    @pytest.mark.parametrize("label", ["caps.agent", "caps_test.unknown"])
+    def test_caps_import_invalid_model(self, tmp_path, access, label):
+        path = tmp_path / "accesses.jsonl"
+        call_command("caps_export", output=str(path), stderr=StringIO())
+        item = {**json.loads(path.read_text()), "model": label}
+        path.write_text(json.dumps(item) + "\n")
+        with pytest.raises(CommandError):
+            call_command("caps_import", str(path), stdout=StringIO())
+
+    def test_caps_import_invalid_model_no_write(self, tmp_path, access):
+        path = tmp_path / "accesses.jsonl"
+        call_command("caps_export", output=str(path), stderr=StringIO())
+        item = json.loads(path.read_text())
+        Access.objects.all().delete()
+        path.write_text(json.dumps(item) + "\n" + json.dumps({**item, "uuid": str(uuid4()), "model": "caps.agent"}))
+        with pytest.raises(CommandError):
+            call_command("caps_import", str(path), batch_size=1, stdout=StringIO())
+        assert not Access.objects.exists()
+
+    def test_caps_import_missing_reference(self, tmp_path, access):
+        path = tmp_path / "accesses.jsonl"
+        call_command("caps_export", output=str(path), stderr=StringIO())
+        Access.objects.all().delete()
+        access.target.delete()
+        with pytest.raises(CommandError):
+            call_command("caps_import", str(path), stdout=StringIO())
+
+    def test_bulk_create_sets_tree(self, access, group_agent):
+        access = Access.objects.get(pk=access.pk)
+        objs = [
+            Access(
+                origin_id=access.pk,
+                target_id=access.target_id,
+                emitter_id=access.receiver_id,
+                receiver=group_agent,
+                grants={},
+            )
+        ]
+        Access.objects.bulk_create(objs)
+        assert (objs[0].root_id, objs[0].depth, objs[0].path) == (access.pk, 1, get_path_segment(access.pk))
+
+    def test_bulk_create_validates_in_one_query(self, access, group_agent, user_agent):
+        origins = [access, access.share(group_agent)]
+        objs = [
+            Access(
+                origin_id=origin.pk,
+                target_id=access.target_id,
+                emitter_id=origin.receiver_id,
+                receiver=user_agent,
+                grants={},
+            )
+            for origin in origins
+        ]
+        with capture_statements() as statements:
+            Access.objects.bulk_create(objs)
+        assert len([s for s in statements if s.startswith("SELECT")]) == 1
+        assert [obj.depth for obj in objs] == [1, 2]
+
+    def test_bulk_create_invalid_emitter(self, access, group_agent):
+        obj = Access(
+            origin_id=access.pk, target_id=access.target_id, emitter=group_agent, receiver=group_agent, grants={}
+        )
+        with pytest.raises(ValueError):
+            Access.objects.bulk_create([obj])
+        assert not Access.objects.filter(origin=access).exists()
+
+    def test_bulk_update(self, access, group_agent):
+        child = access.share(group_agent)
+        child = Access.objects.get(pk=child.pk)
+        child.grants = {}
+        with capture_statements() as statements:
+            Access.objects.bulk_update([child], ["grants"])
+        assert len([s for s in statements if s.startswith("SELECT")]) == 1
+        assert Access.objects.get(pk=child.pk).grants == {}
+
+    def test_bulk_update_invalid_emitter(self, access, group_agent):
+        child = Access.objects.get(pk=access.share(group_agent).pk)
+        child.emitter = group_agent
+        with pytest.raises(ValueError):
+            Access.objects.bulk_update([child], ["emitter"])
+        assert Access.objects.get(pk=child.pk).emitter_id == access.receiver_id
+
+    def test_granting(self, access, perm):
+        other = access.share(access.receiver)
+        Access.objects.filter(pk=other.pk).update(grants={perm: 1})
+        assert list(Access.objects.granting(perm)) == [other]
+        assert not Access.objects.granting(perm, "caps_test.change_concreteowned").exists()
+
+    def test_granting_encoded(self, grants_encoding, access, group_agent):
+        child = access.share(group_agent, {"caps_test.change_concreteowned": 1})
+        assertCountEqual(Access.objects.granting("caps_test.change_concreteowned"), [access, child])
+        assert list(Access.objects.granting("caps_test.view_concreteowned")) == [access]
+        assert not Access.objects.granting("caps_test.view_concreteowned", "caps_test.unknown").exists()
+
+    def test_with_perm(self, access, group_agent):
+        child = access.share(group_agent, {"caps_test.change_concreteowned": 1})
+        assert list(Access.objects.with_perm("caps_test.view_concreteowned")) == [access]
+        assertCountEqual(Access.objects.with_perm("caps_test.change_concreteowned"), [access, child])
+
+    def test_with_perm_access_grants(self, access_grants, access, group_agent):
+        child = access.share(group_agent, {"caps_test.change_concreteowned": 1})
+        assert list(Access.objects.with_perm("caps_test.view_concreteowned")) == [access]
+        assertCountEqual(Access.objects.with_perm("caps_test.change_concreteowned"), [access, child])
+        assert Access.Grant._meta.db_table in str(Access.objects.with_perm("caps_test.view_concreteowned").query)
+
+    def test_save_grants(self, access_grants, access):
+        assert dict(access.access_grants.values_list("permission", "reshare")) == access.grants
+        access.grants = {"caps_test.view_concreteowned": 1}
+        access.save()
+        assert dict(access.access_grants.values_list("permission", "reshare")) == access.grants
+
+    def test_save_grants_unchanged(self, access_grants, access):
+        access = Access.objects.get(pk=access.pk)
+        access.expiration = tz.now() + timedelta(days=1)
+        with capture_statements() as statements:
+            access.save(update_fields=["expiration"])
+            access.save()
+        assert not any(Access.Grant._meta.db_table in sql for sql in statements)
+
+        access.grants = {"caps_test.view_concreteowned": 1}
+        access.save(update_fields=["grants"])
+        assert dict(access.access_grants.values_list("permission", "reshare")) == access.grants
+
+    def test_bulk_create_grants(self, access_grants, access, group_agent, user_agent):
+        accesses = access.share_many([group_agent, user_agent])
+        for obj in accesses:
+            assert dict(obj.access_grants.values_list("permission", "reshare")) == obj.grants
+
+    def test_bulk_create_grants_ignore_conflicts(self, access_grants, access, group_agent, user_agent):
+        # ids of inserted rows are not returned when conflicts are ignored
+        objs = Access.objects.bulk_create(
+            [access.get_share(group_agent), access.get_share(user_agent)], ignore_conflicts=True
+        )
+        for obj in objs:
+            assert obj.pk is not None
+            assert dict(obj.access_grants.values_list("permission", "reshare")) == obj.grants
+
+    def test_save_grants_not_inserted(self, access_grants, access, group_agent):
+        Access.objects.save_grants([access.get_share(group_agent)], replace=False)
+        assert list(Access.Grant.objects.values_list("access", flat=True).distinct()) == [access.pk]
+
+    def test_bulk_update_grants(self, access_grants, access):
+        access.grants = {"caps_test.change_concreteowned": 0}
+        Access.objects.bulk_update([access], ["grants"])
+        assert list(access.access_grants.values_list("permission", "reshare")) == [
+            ("caps_test.change_concreteowned", 0)
+        ]
+
+    def test_revoke_grants(self, access_grants, access, group_agent):
+        access.share(group_agent)
+        assert access.revoke() == 2
+        assert not Access.Grant.objects.exists()
+
+    def test_rebuild_grants(self, settings, access):
+        assert not Access.Grant.objects.exists()
+        settings.CAPS_ACCESS_GRANTS = True
+        out = StringIO()
+        call_command("caps_encode_grants", "--table", stdout=out)
+        registry.clear()
+        assert "rebuilt grants rows of 1 access(es)" in out.getvalue()
+        assert dict(access.access_grants.values_list("permission", "reshare")) == access.grants
+
+    def test_encode_grants(self, settings, access):
+        assert access.perms == 0
+        settings.CAPS_GRANTS_ENCODING = True
+        out = StringIO()
+        try:
+            call_command("caps_encode_grants", stdout=out)
+        finally:
+            registry.clear()
+        assert "encoded grants of 1 access(es)" in out.getvalue()
+        access.refresh_from_db()
+        assert access.perms != 0
+
+    def test_bulk_update_encodes_grants(self, grants_encoding, access):
+        access.grants = {"caps_test.change_concreteowned": 1}
+        Access.objects.bulk_update([access], ["grants"])
+        access = Access.objects.defer("grants").get(pk=access.pk)
+        assert access.get_grants() == {"caps_test.change_concreteowned": 1}
+
+    def test_save_update_fields_encodes_grants(self, grants_encoding, access):
+        assert Access.objects.get(pk=access.pk).perms != 0
+        access.grants = {}
+        access.save(update_fields=["grants"])
+        access = Access.objects.get(pk=access.pk)
+        assert access.perms == 0
+        assert not Access.objects.granting("caps_test.view_concreteowned").exists()
+
     def test_emitter(self, agents):
         for agent in agents:
             for access in Access.objects.emitter(agent):
@@ -47,6 +368,16 @@ class TestAccessQuerySet:
                 with pytest.raises(Access.DoesNotExist):
                     Access.objects.access(agent, access.uuid)
 
+    @pytest.mark.asyncio
+    async def test_aaccess(self, user_2, user_2_agent, access):
+        assert (await Access.objects.aaccess(AgentSet(user_2), access.uuid)).pk == access.pk
+        assert (await Access.objects.aaccess(user_2_agent, access.uuid)).pk == access.pk
+
+    @pytest.mark.asyncio
+    async def test_aaccess_wrong_agent(self, user, access):
+        with pytest.raises(Access.DoesNotExist):
+            await Access.objects.aaccess(AgentSet(user), access.uuid)
+
     def test_accesses(self, agents, accesses):
         for agent in agents:
             items = {access.uuid for access in accesses if access.receiver == agent}
@@ -77,17 +408,109 @@ class TestAccess:
             assert not access.has_perm(user, perm)
         assert not access.has_perm(user, orphan_perm)
 
+    @pytest.mark.asyncio
+    async def test_ahas_perm(self, access, user, user_2, orphan_perm):
+        access = await Access.objects.aget(pk=access.pk)
+        for perm in access.grants.keys():
+            assert await access.ahas_perm(user_2, perm)
+            assert not await access.ahas_perm(user, perm)
+        assert not await access.ahas_perm(user_2, orphan_perm)
+
     def test_get_all_permissions(self, access, user_2):
         assert access.get_all_permissions(user_2) == set(access.grants.keys())
 
+    def test_has_perm_encoded(self, grants_encoding, access, user_2):
+        grants_encoding.load(["caps_test.delete_concreteowned"])
+        access = Access.objects.defer("grants").get(pk=access.pk)
+        assert access.has_perm(user_2, "caps_test.view_concreteowned")
+        assert not access.has_perm(user_2, "caps_test.delete_concreteowned")
+        assert "grants" in access.get_deferred_fields()
+
+    def test_get_all_permissions_encoded(self, grants_encoding, access, user_2):
+        access = Access.objects.defer("grants").get(pk=access.pk)
+        assert access.get_all_permissions(user_2) == set(ConcreteOwned.root_grants)
+
+    def test_has_perm_no_intern(self, grants_encoding, access, user_2):
+        grants_encoding.clear()
+        PermissionBit.objects.all().delete()
+        access = Access.objects.get(pk=access.pk)
+        for load in (False, True):
+            assert access.has_grant("caps_test.view_concreteowned", load)
+        assert access.has_perm(user_2, "caps_test.view_concreteowned")
+        assert not PermissionBit.objects.exists()
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_aget_all_permissions_encoded(self, grants_encoding, access, user_2):
+        grants_encoding.clear()
+        access = await Access.objects.defer("grants").aget(pk=access.pk)
+        assert await access.aget_all_permissions(user_2) == set(ConcreteOwned.root_grants)
+        assert "grants" in access.get_deferred_fields()
+
     def test_get_all_permissions_wrong_user(self, access, user):
         assert not access.get_all_permissions(user)
 
+    def test_get_concrete_models(self):
+        from caps.models import Access as BaseAccess
+
+        assert Access in BaseAccess.get_concrete_models()
+
     def test_is_valid(self, accesses):
         assert accesses[2].is_valid()
         assert accesses[1].is_valid()
         assert accesses[0].is_valid()
 
+    def test_is_valid_invalid_emitter(self, access, group_agent):
+        obj = Access(origin=access, target=access.target, emitter=group_agent, receiver=group_agent, grants={})
+        with pytest.raises(ValueError):
+            obj.is_valid()
+
+    def test_share_sets_tree(self, access, group_agent, user_agent):
+        assert (access.root_id, access.depth, access.path) == (None, 0, "")
+        child = access.share(group_agent)
+        assert (child.root_id, child.depth, child.path) == (access.pk, 1, get_path_segment(access.pk))
+        grandchild = child.share(user_agent)
+        assert (grandchild.root_id, grandchild.depth, grandchild.path) == (
+            access.pk,
+            2,
+            get_path_segment(access.pk) + get_path_segment(child.pk),
+        )
+
+    def test_set_tree_too_deep(self, access):
+        max_depth = Access._meta.get_field("path").max_length // len(get_path_segment(1))
+        obj = Access(origin_id=access.pk)
+        obj.set_tree((access.pk, None, access.pk, max_depth - 1, get_path_segment(1) * (max_depth - 1)))
+        assert obj.depth == max_depth
+        with pytest.raises(ValueError):
+            obj.set_tree((access.pk, None, access.pk, max_depth, get_path_segment(1) * max_depth))
+
+    def test_save_sets_tree(self, access, group_agent):
+        obj = Access(
+            origin_id=access.pk, target=access.target, emitter=access.receiver, receiver=group_agent, grants={}
+        )
+        obj.save()
+        assert (obj.root_id, obj.depth, obj.path) == (access.pk, 1, get_path_segment(access.pk))
+
+    def test_revoke(self, access, group_agent, user_agent):
+        access.share(group_agent).share(user_agent)
+        assert access.revoke() == 3
+        assert not Access.objects.exists()
+
+    def test_backfill_access_tree(self, access, group_agent, user_agent):
+        child = access.share(group_agent)
+        grandchild = child.share(user_agent)
+        Access.objects.update(root=None, depth=0, path="")
+
+        backfill_access_tree("caps_test.ConcreteOwnedAccess")(apps, SimpleNamespace(connection=connection))
+        child.refresh_from_db()
+        grandchild.refresh_from_db()
+        assert (child.root_id, child.depth, child.path) == (access.pk, 1, get_path_segment(access.pk))
+        assert (grandchild.root_id, grandchild.depth, grandchild.path) == (
+            access.pk,
+            2,
+            get_path_segment(access.pk) + get_path_segment(child.pk),
+        )
+
     def test_share(self, access, group_agent):
         obj = access.share(group_agent)
         assert obj.origin == access
@@ -95,6 +518,25 @@ class TestAccess:
         assert obj.emitter == access.receiver
         assert obj.grants.keys() == access.grants.keys()
 
+    def test_share_many(self, access, group_agent, user_agent):
+        objs = access.share_many([group_agent, user_agent.uuid])
+        assert [obj.receiver_id for obj in objs] == [group_agent.pk, user_agent.pk]
+        assert all(obj.pk and obj.origin_id == access.pk and obj.depth == 1 for obj in objs)
+        assert all(obj.grants == access.get_share_grants() for obj in objs)
+
+    @pytest.mark.asyncio
+    async def test_ashare_many(self, access, group_agent, user_agent):
+        accesses = await access.ashare_many([group_agent, user_agent.uuid])
+        assert [(a.origin_id, a.receiver_id, a.depth) for a in accesses] == [
+            (access.pk, group_agent.pk, 1),
+            (access.pk, user_agent.pk, 1),
+        ]
+
+    def test_share_many_not_allowed(self, access, group_agent):
+        access.grants = {"a": 0}
+        with pytest.raises(PermissionDenied):
+            access.share_many([group_agent])
+
     def test_get_share_grants_with_defaults(self, access):
         result = access.get_share_grants()
         assert all(v == access.grants[k] - 1 for k, v in result.items())
@@ -115,9 +557,20 @@ class TestAccess:
             "emitter_id": access.receiver_id,
             "receiver": group_agent,
             "origin": access,
-            "target": access.target,
+            "target_id": access.target_id,
         }
 
+    def test_share_single_insert(self, access, group_agent, django_assert_num_queries):
+        access = Access.objects.get(pk=access.pk)
+        with django_assert_num_queries(1) as ctx:
+            shared = access.share(group_agent.pk)
+        assert ctx.captured_queries[0]["sql"].startswith("INSERT")
+        assert (shared.receiver_id, shared.emitter_id, shared.target_id) == (
+            group_agent.pk,
+            access.receiver_id,
+            access.target_id,
+        )
+
     def test_get_share_kwargs_expired_raise_permission_denied(self, access, group_agent):
         access.expiration = tz.now() - timedelta(hours=1)
         with pytest.raises(PermissionDenied):
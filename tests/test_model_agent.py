@@ -1,10 +1,15 @@
+from uuid import uuid4
+
 import pytest
 from django.core.exceptions import ValidationError
-from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import AnonymousUser, Group, User
 
-from caps.models import Agent
+from caps.models import Agent, AgentMembership, AgentSet
 
-__all__ = ("TestAgentQuerySet", "TestAgent")
+__all__ = ("TestAgentQuerySet", "TestAgent", "TestAgentSet", "TestAgentMembership")
 
 
 # TODO:
@@ -31,6 +36,51 @@ class TestAgentQuerySet:
             assert queryset.count() == 1
             assert group == next(iter(queryset)).group
 
+    @pytest.mark.asyncio
+    async def test_auser(self, user, user_agents):
+        query = await Agent.objects.auser(user)
+        assert {a async for a in query} == set(user_agents)
+
+    def test_get_many(self, user_agent, group_agent, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            agents = Agent.objects.get_many([group_agent.uuid, user_agent, str(group_agent.uuid)])
+        assert agents == [group_agent, user_agent]
+
+    @pytest.mark.asyncio
+    async def test_aget_many(self, user_agent, group_agent):
+        agents = await Agent.objects.aget_many([group_agent.uuid, user_agent, str(group_agent.uuid)])
+        assert agents == [group_agent, user_agent]
+
+    def test_get_many_raises_does_not_exist(self, user_agent):
+        with pytest.raises(Agent.DoesNotExist):
+            Agent.objects.get_many([user_agent.uuid, uuid4()])
+
+    def test_ensure_for_users(self, user_agent):
+        users = User.objects.bulk_create([User(username=f"bulk-{i}") for i in range(5)])
+        with CaptureQueriesContext(connection) as ctx:
+            assert Agent.objects.ensure_for_users(batch_size=2) == len(users)
+        # one insert per batch
+        assert sum(q["sql"].startswith("INSERT") for q in ctx.captured_queries) == 3
+        assert Agent.objects.filter(user__in=users).count() == len(users)
+        assert Agent.objects.ensure_for_users() == 0
+
+    def test_ensure_for_users_queryset(self, user_agent):
+        users = User.objects.bulk_create([User(username=f"bulk-{i}") for i in range(3)])
+        assert Agent.objects.ensure_for_users(User.objects.filter(pk=users[0].pk)) == 1
+        assert not Agent.objects.filter(user__in=users[1:]).exists()
+
+    def test_ensure_for_groups(self, groups):
+        new_groups = Group.objects.bulk_create([Group(name=f"bulk-{i}") for i in range(3)])
+        assert Agent.objects.ensure_for_groups() == len(new_groups)
+        assert Agent.objects.filter(group__in=new_groups).count() == len(new_groups)
+
+    def test_caps_ensure_agents_command(self, user_agent):
+        User.objects.bulk_create([User(username=f"bulk-{i}") for i in range(3)])
+        Group.objects.bulk_create([Group(name=f"bulk-{i}") for i in range(2)])
+        call_command("caps_ensure_agents", batch_size=2)
+        assert not User.objects.filter(agent__isnull=True).exists()
+        assert not Group.objects.filter(agent__isnull=True).exists()
+
 
 @pytest.mark.django_db(transaction=True)
 class TestAgent:
@@ -56,7 +106,102 @@ class TestAgent:
         assert group_agent.is_agent(user)
         assert not group_agent.is_agent(AnonymousUser())
 
+    @pytest.mark.asyncio
+    async def test_ais_agent(self, user, user_agent, group_agent, anon_agent):
+        assert await user_agent.ais_agent(user)
+        assert await group_agent.ais_agent(user)
+        assert not await anon_agent.ais_agent(user)
+        assert await anon_agent.ais_agent(AnonymousUser())
+
     def test_clean_raises_on_user_and_group(self, user, groups):
         agent = Agent(user=user, group=groups[0])
         with pytest.raises(ValidationError):
             agent.clean()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAgentSet:
+    def test_lazy(self, user, user_agents, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            agents = AgentSet(user)
+        assert not agents.is_loaded
+
+    def test_agents_evaluated_once(self, user, user_agent, user_agents, django_assert_num_queries):
+        agents = AgentSet(user)
+        with django_assert_num_queries(1):
+            assert agents[0] == user_agent
+            assert agents.agent == user_agent
+            assert user_agent in agents
+            assert set(agents.ids) == {a.pk for a in user_agents}
+            assert len(agents) == len(user_agents)
+
+    def test_contains(self, user, user_agents, user_2_agent):
+        agents = AgentSet(user)
+        assert all(agent in agents for agent in user_agents)
+        assert user_agents[0].pk in agents
+        assert user_2_agent not in agents
+
+    def test_agent_anonymous(self, anon_agent):
+        assert AgentSet(AnonymousUser()).agent == anon_agent
+
+    @pytest.mark.asyncio
+    async def test_aload(self, user, user_agent, user_agents):
+        agents = await AgentSet(user).aload()
+        assert agents.is_loaded
+        assert agents.agent == user_agent
+        assert set(agents) == set(user_agents)
+
+    def test_add(self, user, user_agent, user_agents):
+        agents = AgentSet(user, Agent.objects.group(user.groups.first()))
+        assert agents.agent is None
+        agents.add(user_agent)
+        assert agents[0] == user_agent
+        assert agents.agent == user_agent
+        assert user_agent.pk in agents.ids
+
+
+@pytest.fixture
+def memberships(settings, user, user_2, user_agents, groups):
+    settings.CAPS_AGENT_MEMBERSHIP = True
+    AgentMembership.objects.rebuild()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAgentMembership:
+    def get_agents(self, user):
+        return set(AgentMembership.objects.filter(user=user).values_list("agent_id", flat=True))
+
+    def test_rebuild(self, memberships, user, user_agents):
+        assert self.get_agents(user) == {a.pk for a in user_agents}
+
+    def test_user(self, memberships, user, user_agents, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert set(Agent.objects.user(user)) == set(user_agents)
+
+    def test_group_added(self, memberships, user, groups):
+        user.groups.add(groups[1])
+        assert groups[1].agent.pk in self.get_agents(user)
+
+    def test_group_added_reverse(self, memberships, user, user_2, groups):
+        groups[1].user_set.add(user, user_2)
+        assert groups[1].agent.pk in self.get_agents(user)
+        assert groups[1].agent.pk in self.get_agents(user_2)
+
+    def test_group_removed(self, memberships, user, user_group):
+        user.groups.remove(user_group)
+        assert self.get_agents(user) == {user.agent.pk}
+
+    def test_groups_cleared(self, memberships, user, user_2, user_group):
+        user.groups.clear()
+        assert self.get_agents(user) == {user.agent.pk}
+        user_group.user_set.clear()
+        assert self.get_agents(user_2) == {user_2.agent.pk}
+
+    def test_agent_created(self, memberships):
+        user = User.objects.create_user(username="new-user")
+        assert self.get_agents(user) == {user.agent.pk}
+
+    def test_ensure_for_users(self, memberships):
+        (user,) = User.objects.bulk_create([User(username="bulk")])
+        Agent.objects.ensure_for_users()
+        assert len(self.get_agents(user)) == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from caps.models import PermissionBit, PermissionRegistry
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPermissionBitQuerySet:
+    def test_intern(self):
+        assert PermissionBit.objects.intern(["app.b", "app.a"]) == {"app.a": 0, "app.b": 1}
+        assert PermissionBit.objects.intern(["app.c", "app.a"]) == {"app.a": 0, "app.b": 1, "app.c": 2}
+
+    def test_intern_max_bits(self, monkeypatch):
+        monkeypatch.setattr(PermissionBit, "MAX_BITS", 2)
+        assert PermissionBit.objects.intern(["app.a", "app.b", "app.c"]) == {"app.a": 0, "app.b": 1}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPermissionRegistry:
+    def test_load_registered_first(self):
+        registry = PermissionRegistry()
+        registry.register(["app.z"])
+        registry.load(["app.a"])
+        assert registry.bits == {"app.a": 0, "app.z": 1}
+
+    def test_get_bit(self):
+        registry = PermissionRegistry()
+        registry.register(["app.a"])
+        assert registry.get_bit("app.a", load=False) is None
+        # reading never interns permissions
+        assert registry.get_bit("app.a") is None
+        assert not PermissionBit.objects.exists()
+        registry.load()
+        assert registry.get_bit("app.a") == 0
+        assert registry.get_bit("app.b") is None
+
+    def test_get_mask(self):
+        registry = PermissionRegistry()
+        registry.load(["app.a", "app.b", "app.c"])
+        assert registry.get_mask(["app.a", "app.c"]) == 0b101
+        assert registry.get_mask(["app.a", "app.d"]) is None
+
+    def test_encode_decode(self):
+        registry = PermissionRegistry()
+        registry.load(["app.a", "app.b"])
+        grants = {"app.b": 3, "app.c": 0}
+        perms, reshares = registry.encode(grants)
+        assert (perms, reshares) == (0b110, bytes([0, 3, 0]))
+        assert registry.decode(perms, reshares) == grants
+
+    def test_decode_reloads_unknown_bits(self):
+        registry, other = PermissionRegistry(), PermissionRegistry()
+        registry.load()
+        perms, reshares = other.encode({"app.a": 2})
+        assert registry.decode(perms, reshares) == {"app.a": 2}
+
+    def test_encode_overflow(self, monkeypatch):
+        monkeypatch.setattr(PermissionBit, "MAX_BITS", 1)
+        registry = PermissionRegistry()
+        assert registry.encode({"app.a": 1, "app.b": 1}) == (1, bytes([1]))
+        assert registry.overflow == {"app.b"}
@@ -1,10 +1,54 @@
 from datetime import timedelta
+from uuid import uuid4
 import pytest
 
+from django.db import models
+from django.test.utils import isolate_apps
 from django.utils import timezone as tz
 
+from caps import cache
+from caps.models import Access as BaseAccess, AccessBase, Agent, AgentSet, Owned, OwnedQuerySet
 from .app.models import ConcreteOwned, Access
-from .conftest import assertCountEqual
+from .conftest import assertCountEqual, capture_statements
+
+
+class TestOwnedBase:
+    def test_access_indexes(self):
+        indexes = {(tuple(index.fields), index.condition is not None): index for index in Access._meta.indexes}
+        assert set(indexes) == {
+            (("receiver", "expiration"), False),
+            (("receiver",), True),
+            (("target", "receiver"), False),
+            (("uuid", "receiver"), False),
+        }
+        assert all(len(index.name) <= 30 for index in indexes.values())
+        # covered by the composite indexes
+        assert not any(Access._meta.get_field(name).db_index for name in ("receiver", "target", "uuid"))
+
+    def test_access_indexes_abstract(self):
+        assert AccessBase.get_access_indexes(BaseAccess) == []
+
+    @isolate_apps("tests.app")
+    def test_access_indexes_declared(self):
+        class DeclaredOwned(Owned):
+            class Access(BaseAccess):
+                target = models.ForeignKey("DeclaredOwned", models.CASCADE, related_name="accesses")
+
+                class Meta:
+                    app_label = "caps_test"
+                    indexes = [models.Index(fields=["emitter"], name="declared_emitter")]
+
+            class Meta:
+                app_label = "caps_test"
+
+        indexes = [tuple(index.fields) for index in DeclaredOwned.Access._meta.indexes]
+        assert indexes == [
+            ("emitter",),
+            ("receiver", "expiration"),
+            ("receiver",),
+            ("target", "receiver"),
+            ("uuid", "receiver"),
+        ]
 
 
 class TestOwnedQuerySet:
@@ -12,14 +56,115 @@ class TestOwnedQuerySet:
         query = ConcreteOwned.objects.available(user_agent)
         assertCountEqual(query, objects)
 
-    def test_available_with_access(self, user_2_agent, objects):
+    @pytest.mark.parametrize("strategy", OwnedQuerySet.strategies)
+    def test_available_with_access(self, strategy, user_2_agent, objects):
+        objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.available(user_2_agent, Access.objects.all(), strategy)
+        assert list(query) == [objects[0]]
+
+    @pytest.mark.parametrize("strategy", OwnedQuerySet.strategies)
+    def test_available_with_owner_and_access(self, strategy, user_agent, user_2_agent, objects, user_2_object):
+        objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.available([user_agent, user_2_agent], Access.objects.all(), strategy)
+        assertCountEqual(query, objects + [user_2_object])
+
+    @pytest.mark.parametrize("strategy", ["exists", "union"])
+    def test_available_no_duplicates(self, strategy, user_2_agent, group_agent, objects):
+        objects[0].share(user_2_agent)
+        objects[0].share(group_agent)
+        query = ConcreteOwned.objects.available([user_2_agent, group_agent], Access.objects.all(), strategy)
+        assert list(query) == [objects[0]]
+
+    def test_available_default_strategy(self, settings, user_2_agent, group_agent, objects):
+        if hasattr(settings, "CAPS_AVAILABLE_STRATEGY"):
+            del settings.CAPS_AVAILABLE_STRATEGY
+        objects[0].share(user_2_agent)
+        objects[0].share(group_agent)
+        query = ConcreteOwned.objects.available([user_2_agent, group_agent], Access.objects.all())
+        assert "EXISTS" in str(query.query)
+        assert list(query) == [objects[0]]
+
+    def test_available_strategy_setting(self, settings, user_2_agent, objects):
+        settings.CAPS_AVAILABLE_STRATEGY = "or"
         objects[0].share(user_2_agent)
         query = ConcreteOwned.objects.available(user_2_agent, Access.objects.all())
+        assert "EXISTS" not in str(query.query)
         assert list(query) == [objects[0]]
 
-    def test_available_with_access_expired(self, user_2_agent, objects):
+    @pytest.mark.parametrize("strategy", OwnedQuerySet.strategies)
+    def test_available_with_access_expired(self, strategy, user_2_agent, objects):
         objects[0].share(user_2_agent, expiration=tz.now() - timedelta(hours=1))
-        assert not ConcreteOwned.objects.available(user_2_agent, Access.objects.all()).exists()
+        assert not ConcreteOwned.objects.available(user_2_agent, Access.objects.all(), strategy).exists()
+
+    @pytest.mark.parametrize("model", [ConcreteOwned, Access])
+    def test_available_union_ordered(self, monkeypatch, model, user_agent, user_2_agent, objects):
+        monkeypatch.setattr(model._meta, "ordering", ["-pk"])
+        objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.available([user_2_agent], Access.objects.all(), "union")
+        assert list(query) == [objects[0]]
+
+    def test_available_join_many_agents(self, user_2_agent, group_agent, objects, django_assert_num_queries):
+        first = objects[0].share(user_2_agent)
+        objects[0].share(group_agent)
+        other = objects[1].share(group_agent)
+        query = ConcreteOwned.objects.available([user_2_agent, group_agent], Access.objects.all(), join=True)
+        with django_assert_num_queries(1):
+            result = {obj.pk: obj.access for obj in query}
+        assert result == {objects[0].pk: first, objects[1].pk: other}
+
+    def test_available_invalid_strategy(self, user_2_agent):
+        with pytest.raises(ValueError):
+            ConcreteOwned.objects.available(user_2_agent, Access.objects.all(), "invalid")
+
+    @pytest.mark.parametrize("enabled", [False, True])
+    def test_with_perm(self, settings, enabled, user_2_agent, group_agent, objects):
+        settings.CAPS_ACCESS_GRANTS = enabled
+        objects[0].share(user_2_agent)
+        objects[1].share(group_agent, {"caps_test.view_concreteowned": 1})
+        objects[2].share(user_2_agent, expiration=tz.now() - timedelta(hours=1))
+
+        change = ConcreteOwned.objects.with_perm("caps_test.change_concreteowned")
+        assert list(change) == [objects[0]]
+        view = ConcreteOwned.objects.with_perm("caps_test.view_concreteowned", [user_2_agent])
+        assert list(view) == [objects[0]]
+
+    def test_with_perm_owner(self, user_2_agent, objects, user_2_object):
+        objects[0].share(user_2_agent, {"caps_test.view_concreteowned": 1})
+        objects[1].share(user_2_agent)
+
+        change = ConcreteOwned.objects.with_perm("caps_test.change_concreteowned", [user_2_agent])
+        assertCountEqual(change, [objects[1], user_2_object])
+        assert not ConcreteOwned.objects.with_perm("caps_test.invalid", [user_2_agent]).exists()
+
+    def test_with_permissions(self, user, user_2, user_2_agents, objects, user_2_object, django_assert_num_queries):
+        view = "caps_test.view_concreteowned"
+        objects[0].share(user_2_agents[0], {view: 1})
+        access = objects[1].share(user_2_agents[1])
+
+        result = {obj.pk: obj for obj in ConcreteOwned.objects.with_permissions(user_2_agents)}
+        # user's groups are memoized on first use
+        cache.get_user_group_ids(user_2)
+        with django_assert_num_queries(0):
+            assert result[objects[0].pk].get_agent() is result[objects[0].pk].get_agent()
+            assert result[objects[0].pk].get_all_permissions(user_2) == {view}
+            assert not result[objects[0].pk].has_perm(user_2, "caps_test.change_concreteowned")
+            assert result[objects[1].pk].get_all_permissions(user_2) == set(access.grants)
+            assert result[user_2_object.pk].get_all_permissions(user_2) == set(ConcreteOwned.root_grants)
+            assert result[objects[2].pk].agent_grants is None
+
+        # annotation is not used for another user
+        assert result[objects[0].pk].has_perm(user, "caps_test.change_concreteowned")
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_aavailable_list(self, user, user_2, user_2_agent, objects):
+        await objects[0].ashare(user_2_agent)
+        result = await ConcreteOwned.objects.aavailable_list(AgentSet(user_2), Access.objects.all())
+        assert [obj.pk for obj in result] == [objects[0].pk]
+        assert result[0].access.receiver_id == user_2_agent.pk
+
+        result = await ConcreteOwned.objects.aavailable_list(AgentSet(user))
+        assertCountEqual([obj.pk for obj in result], [obj.pk for obj in objects])
 
     def test_access(self, agents, accesses):
         for agent in agents:
@@ -29,12 +174,52 @@ class TestOwnedQuerySet:
             uuids = [r.access.uuid for r in result]
             assertCountEqual(uuids, q_uuids)
 
+    def test_access_join(self, user_2_agent, objects, django_assert_num_queries):
+        access = objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.access(Access.objects.receiver(user_2_agent), join=True).order_by("pk")
+        with django_assert_num_queries(1):
+            result = list(query)
+            assert result[0].access == access
+            assert result[0].access.grants == access.grants
+            assert result[0].access.target is result[0]
+            assert result[0].access_uuid == access.uuid
+            assert all(obj.access is None for obj in result[1:])
+        assert len(result) == len(objects)
+
+    def test_access_join_related_filter(self, user_2, user_2_agent, objects):
+        access = objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.access(Access.objects.filter(receiver__user=user_2), strict=True, join=True)
+        assert [obj.access for obj in query] == [access]
+
+    def test_access_join_strict(self, agents, accesses):
+        for agent in agents:
+            query = Access.objects.receiver(agent)
+            q_uuids = list(query.values_list("uuid", flat=True))
+            result = ConcreteOwned.objects.access(query, strict=True, join=True)
+            assertCountEqual([r.access.uuid for r in result], q_uuids)
+
+    @pytest.mark.parametrize("strategy", OwnedQuerySet.strategies)
+    def test_available_join(self, strategy, user_agent, user_2_agent, objects, user_2_object):
+        access = objects[0].share(user_2_agent)
+        query = ConcreteOwned.objects.available([user_2_agent], Access.objects.all(), strategy, join=True)
+        result = {obj.pk: obj for obj in query}
+        assert set(result) == {objects[0].pk, user_2_object.pk}
+        assert result[objects[0].pk].access == access
+        assert result[user_2_object.pk].access is None
+
 
 @pytest.mark.django_db(transaction=True)
 class TestOwned:
     def test_check_root_grants(self):
         ConcreteOwned.check_root_grants()
 
+    @pytest.mark.asyncio
+    async def test_acheck_root_grants(self, monkeypatch):
+        await ConcreteOwned.acheck_root_grants()
+        monkeypatch.setattr(ConcreteOwned, "root_grants", {"caps_test.invalid": 1})
+        with pytest.raises(ValueError):
+            await ConcreteOwned.acheck_root_grants()
+
     def test_check_root_grants_raises_value_error(self):
         class SubClass(ConcreteOwned):
             root_grants = {"invalid-permission": 1}
@@ -57,5 +242,51 @@ class TestOwned:
         access = object.share(user_2_agent)
         assert access.grants and access.grants == object.root_grants
 
+    @pytest.mark.asyncio
+    async def test_ahas_perm(self, user, user_2, object, access):
+        perm = next(iter(object.root_grants))
+        object = await ConcreteOwned.objects.aget(pk=object.pk)
+        assert await object.ahas_perm(user, perm)
+        assert not await object.ahas_perm(user_2, perm)
+
+        object.access = access
+        assert await object.ahas_perm(user_2, perm)
+        assert not await object.ahas_perm(user_2, "invalid.perm")
+
+    def test_share_single_insert(self, object, user_2_agent, django_assert_num_queries):
+        object = ConcreteOwned.objects.get(pk=object.pk)
+        with django_assert_num_queries(1):
+            access = object.share(user_2_agent.pk)
+        assert (access.receiver_id, access.emitter_id) == (user_2_agent.pk, object.owner_id)
+
+    def test_share_many(self, object, user_2_agent, group_agent, user_agent):
+        receivers = [user_2_agent, group_agent.uuid, str(user_agent.uuid)]
+        object = ConcreteOwned.objects.get(pk=object.pk)
+        with capture_statements() as statements:
+            accesses = object.share_many(receivers)
+        # receivers + insert
+        assert len(statements) == 2
+
+        assert [a.receiver_id for a in accesses] == [user_2_agent.pk, group_agent.pk, user_agent.pk]
+        assert all(a.pk and a.grants == object.root_grants and a.emitter_id == object.owner_id for a in accesses)
+
+    @pytest.mark.asyncio
+    async def test_ashare_many(self, object, user_2_agent, group_agent):
+        accesses = await object.ashare_many([user_2_agent.uuid, group_agent])
+        assert [a.receiver_id for a in accesses] == [user_2_agent.pk, group_agent.pk]
+        assert await Access.objects.filter(target=object).acount() == 2
+
+    @pytest.mark.asyncio
+    async def test_aget_all_permissions(self, user, user_2, object, access):
+        object = await ConcreteOwned.objects.aget(pk=object.pk)
+        assert await object.aget_all_permissions(user) == object.root_grants
+        assert not await object.aget_all_permissions(user_2)
+        object.access = access
+        assert await object.aget_all_permissions(user_2) == set(access.grants)
+
+    def test_share_many_unknown_receiver(self, object):
+        with pytest.raises(Agent.DoesNotExist):
+            object.share_many([uuid4()])
+
     def test_get_absolute_url(self, object, access):
         assert object.get_absolute_url()
@@ -0,0 +1,32 @@
+import pytest
+from rest_framework import exceptions
+
+from caps.permissions import DjangoModelPermissions, OwnedPermissions
+from .app.models import ConcreteOwned
+
+
+class View:
+    perms_map = {"share": ["%(app_label)s.share_%(model_name)s"]}
+    queryset = ConcreteOwned.objects.all()
+
+    def __init__(self, action=None):
+        self.action = action
+
+
+class TestDjangoModelPermissions:
+    def test_get_required_permissions(self):
+        perms = DjangoModelPermissions()
+        assert perms.get_required_permissions(View("share"), "POST", ConcreteOwned) == ["caps_test.share_concreteowned"]
+        assert perms.get_required_permissions(View(), "GET", ConcreteOwned) == ["caps_test.view_concreteowned"]
+
+    def test_get_required_permissions_compiled(self, monkeypatch):
+        perms = OwnedPermissions()
+        expected = perms.get_required_permissions(View("update"), "PUT", ConcreteOwned)
+        assert expected == ["caps_test.change_concreteowned"]
+
+        monkeypatch.setattr(perms, "compile_required_permissions", None)
+        assert perms.get_required_permissions(View("update"), "PUT", ConcreteOwned) == expected
+
+    def test_get_required_permissions_method_not_allowed(self):
+        with pytest.raises(exceptions.MethodNotAllowed):
+            DjangoModelPermissions().get_required_permissions(View(), "TRACE", ConcreteOwned)
@@ -64,3 +64,17 @@ class TestShareSerializer:
     def test_validate_receiver_with_invalid_receiver(self, share_serializer, user_agent):
         with pytest.raises(ValidationError):
             share_serializer.validate_receiver(uuid4())
+
+    def test_validate_receivers(self, share_serializer, user_agent, group_agent):
+        assert share_serializer.validate_receivers([user_agent.uuid, group_agent.uuid]) == [user_agent, group_agent]
+
+    def test_validate_receivers_with_invalid_receiver(self, share_serializer, user_agent):
+        with pytest.raises(ValidationError):
+            share_serializer.validate_receivers([user_agent.uuid, uuid4()])
+
+    def test_validate_requires_receiver_or_receivers(self, user_agent):
+        grants = {"a": 1}
+        assert not serializers.ShareSerializer(data={"grants": grants}).is_valid()
+        data = {"grants": grants, "receiver": user_agent.uuid, "receivers": [user_agent.uuid]}
+        assert not serializers.ShareSerializer(data=data).is_valid()
+        assert serializers.ShareSerializer(data={"grants": grants, "receivers": [user_agent.uuid]}).is_valid()
@@ -61,6 +61,19 @@ class TestOwnedViewSet:
         viewset_mixin.action = "share"
         assert viewset_mixin.get_access_queryset() is None
 
+    @pytest.mark.parametrize("perm", ["change", "caps_test.change_concreteowned"])
+    def test_get_queryset_with_perm(self, perm, viewset_mixin, req, user_agent, objects, user_2_object):
+        user_2_object.share(user_agent, {"caps_test.view_concreteowned": 1})
+        req.query_params = req.GET.copy()
+        viewset_mixin.action, viewset_mixin.kwargs = "list", {}
+
+        req.query_params["perm"] = perm
+        assert user_2_object not in viewset_mixin.get_queryset()
+        assert set(objects) <= set(viewset_mixin.get_queryset())
+
+        req.query_params["perm"] = "view"
+        assert user_2_object in viewset_mixin.get_queryset()
+
     def test_share_valid(self, viewset_mixin, post_req, user_2_agent):
         viewset_mixin.action = "share"
         viewset_mixin.request = post_req
@@ -68,6 +81,17 @@ class TestOwnedViewSet:
         resp = viewset_mixin.share(post_req)
         assert resp.status_code == 201
 
+    def test_share_many(self, viewset_mixin, post_req, user_2_agent, group_agent):
+        viewset_mixin.action = "share"
+        viewset_mixin.request = post_req
+        post_req.data = {
+            "receivers": [user_2_agent.uuid, group_agent.uuid],
+            "grants": {"caps_test.view_concreteowned": 1},
+        }
+        resp = viewset_mixin.share(post_req)
+        assert resp.status_code == 201
+        assert [r["receiver"] for r in resp.data] == [str(user_2_agent.uuid), str(group_agent.uuid)]
+
     def test_share_invalid_data(self, viewset_mixin, post_req):
         viewset_mixin.action = "share"
         viewset_mixin.request = post_req
@@ -106,6 +130,13 @@ class TestAccessViewSet:
         resp = access_viewset.share(access_viewset.request)
         assert resp.data["origin"] == str(access.uuid)
 
+    def test_share_many(self, access_viewset, user_agent, group_agent, access):
+        access_viewset.kwargs = {"uuid": access.uuid}
+        access_viewset.request.data = {"receivers": [group_agent.uuid, user_agent.uuid], "grants": access.grants}
+        resp = access_viewset.share(access_viewset.request)
+        assert resp.status_code == 201
+        assert [r["origin"] for r in resp.data] == [str(access.uuid)] * 2
+
     def test_share_invalid(self, access_viewset, access, group_agent):
         access_viewset.kwargs = {"uuid": access.uuid}
         access_viewset.request.data = {"receiver": group_agent.uuid, "grants": "list"}
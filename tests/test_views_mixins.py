@@ -3,6 +3,7 @@ from uuid import uuid4
 import pytest
 from django.http import Http404
 
+from caps.models import AgentSet
 from caps.views import mixins
 from .conftest import init_request, req_factory
 from .app.models import ConcreteOwned
@@ -46,9 +47,26 @@ def object_mixin(req):
     return OwnedMixin(request=req)
 
 
+class TestUserAgentMixin:
+    def test_agents_from_request(self, object_mixin, req, user_agent):
+        req.agents = AgentSet(req.user)
+        assert object_mixin.agents is req.agents
+        assert object_mixin.agent == user_agent
+
+    def test_agents_without_request_agents(self, object_mixin, user_agent, user_agents):
+        assert isinstance(object_mixin.agents, AgentSet)
+        assert object_mixin.agent == user_agent
+
+
 @pytest.mark.django_db(transaction=True)
 class TestOwnedMixin:
-    pass
+    def test_get_queryset_uses_agents_once(self, object_mixin, objects, django_assert_num_queries):
+        object_mixin.request.agents = AgentSet(object_mixin.request.user)
+        # agents + objects + prefetched accesses
+        with django_assert_num_queries(3):
+            list(object_mixin.get_queryset())
+        with django_assert_num_queries(2):
+            list(object_mixin.get_queryset())
 
 
 @pytest.fixture